@@ -1,6 +1,7 @@
 import pygame
 import math
-from queue import PriorityQueue
+from grid_search import Grid, SearchStats, astar_search
+from dstar_lite import DStarLite
 
 WIDTH = 800
 WIN = pygame.display.set_mode((WIDTH, WIDTH))
@@ -17,17 +18,32 @@ ORANGE = (255, 165, 0)
 GREY = (128, 128, 128)
 TURQUISE = (64, 224, 208)
 
+FPS = 60 # frame cap for the main loop
+SEARCH_FPS = 60 # how often a running search is shown; expansions in between are drawn together
+
 class Vertex:
-    def __init__(self, row, col, width, total_rows):
+    def __init__(self, row, col, width, total_rows, dirty=None):
         self.row = row
         self.col = col
         self.x = row * width
         self.y = col * width
-        self.color = WHITE
+        self._color = WHITE
+        self.dirty = dirty # set shared with the Renderer, gets this vertex when its colour changes
         self.neighbors = []
         self.width = width
         self.total_rows = total_rows
 
+    @property
+    def color(self):
+        return self._color
+
+    @color.setter
+    def color(self, color):
+        if color != self._color:
+            self._color = color
+            if self.dirty is not None:
+                self.dirty.add(self)
+
     def get_pos(self):
         return self.row, self.col
     
@@ -88,112 +104,71 @@ class Vertex:
         return False
     
 
-# def h(p1,p2): # heuristic method (vertical distance)
-#     x1, y1 = p1
-#     x2, y2 = p2
-#     #return 0 #Dijkstra
-#     return abs(y2-y1) #Vertical
-#This function calculates the distance between two points, 
-# but only looks at the vertical (y) direction.
-
-
-# def h(p1, p2):
-#     x1, y1 = p1
-#     x2, y2 = p2
-#     return abs(x2 - x1)  # Horizontal distance
-#This function calculates the distance between two points, 
-# but only looks at the horizontal (x) direction
-
-# import math
-
-# def h(p1, p2):
-#     x1, y1 = p1
-#     x2, y2 = p2
-#     return abs(x2 - x1) + abs(y2 - y1)  # Manhattan distance
-#This function calculates the total distance by 
-#adding both the horizontal and vertical distances
-
-
-# def h(p1, p2):
-#     x1, y1 = p1
-#     x2, y2 = p2
-#     return math.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)  # Euclidean distance
-#This function calculates the straight-line (diagonal) distance between two points, l
-# ike measuring the shortest path between two locations
-
-
-# def h(p1, p2):
-#     x1, y1 = p1
-#     x2, y2 = p2
-#     return max(abs(x2 - x1), abs(y2 - y1))  # Chebyshev distance
-#This function calculates the distance by finding the maximum difference 
-# between the horizontal or vertical direction
-def h(p1, p2):
-    # Always return a very large number to make the heuristic effectively useless
-    return float("inf")  # This will make A* behave just like Dijkstra
-
-
-
-
-
-def reconstruct_path(came_from, current, draw):
-     while current in came_from:
-         current = came_from[current]
-         current.make_path()
-         draw()
-
-def astar(draw, grid, start, end): ## main logic of A-star implementation 
-    count = 0
-    open_set = PriorityQueue()
-    open_set.put((0, count, start))
-    came_from = {}
-    g_score = {vertex: float("inf") for row in grid for vertex in row}
-    g_score[start] = 0
-    f_score = {vertex: float("inf") for row in grid for vertex in row}
-    f_score[start] = h(start.get_pos(), end.get_pos())
-    
-    open_set_hash = {start}
+# Heuristic used by the search, any name from grid_search.HEURISTICS:
+# "manhattan" (default for this 4-connected grid), "euclidean", "chebyshev",
+# "vertical", "horizontal", or "zero" to make A* behave just like Dijkstra
+HEURISTIC = "manhattan"
+
+# With INCREMENTAL on, SPACE keeps one D* Lite planner between searches and
+# only repairs the cells around your edits instead of searching from scratch
+INCREMENTAL = True
+
+# With PROFILE on, every plain A* search (INCREMENTAL off) prints its counters
+# and timings, and the order it expanded cells in goes to PROFILE_TRACE (a CSV)
+PROFILE = False
+PROFILE_TRACE = "astar_trace.csv"
+
+
+def clear_search(grid): ## wipes the open/closed/path colours of the last search
+    for row in grid:
+        for vertex in row:
+            if vertex.is_open() or vertex.is_closed() or vertex.color == PURPLE:
+                vertex.reset()
+
 
-    while not open_set.empty():
+def astar(draw, grid, walls, start, end, planner=None, stats=None): ## runs the headless search and animates its progress
+    def show_progress(opened, closed):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                pygame.quit()
-        
-        current = open_set.get()[2]
-        open_set_hash.remove(current)
-
-        if current == end:
-            reconstruct_path(came_from, end, draw)
-            end.make_end()
-            return True # make path
-
-        for neighbor in current.neighbors:
-            temp_g_score = g_score[current] + 1
-
-            if temp_g_score < g_score[neighbor]:
-                came_from[neighbor] = current
-                g_score[neighbor] = temp_g_score
-                f_score[neighbor] = temp_g_score + h(neighbor.get_pos(), end.get_pos())
-                if neighbor not in open_set_hash:
-                    count += 1
-                    open_set.put((f_score[neighbor],count, neighbor))
-                    open_set_hash.add(neighbor)
-                    neighbor.make_open()
-
+                pygame.event.post(event) # let main() see it and close the window
+                return False
+
+        for index in opened:
+            row, col = walls.position(index)
+            vertex = grid[row][col]
+            if vertex != start and vertex != end:
+                vertex.make_open()
+        for index in closed:
+            row, col = walls.position(index)
+            vertex = grid[row][col]
+            if vertex != start:
+                vertex.make_closed()
         draw()
 
-        if current != start:
-            current.make_closed()
+    if planner is not None:
+        # only the repaired cells get coloured, so drop what the last search left behind
+        clear_search(grid)
+        result = planner.compute(observer=show_progress)
+    else:
+        result = astar_search(walls, walls.index(*start.get_pos()), walls.index(*end.get_pos()), HEURISTIC,
+                              observer=show_progress, stats=stats)
+    if not result.found:
+        return False
 
-    return False
+    for index in reversed(result.path[:-1]): # walk back from the end, like before
+        row, col = walls.position(index)
+        grid[row][col].make_path()
+        draw()
+    end.make_end()
+    return True # make path
 
-def make_grid(rows, width):
+def make_grid(rows, width, dirty=None):
     grid = []
     gap = width // rows
     for i in range(rows):
         grid.append([])
         for j in range(rows):
-            vertex = Vertex(i, j, gap, rows)
+            vertex = Vertex(i, j, gap, rows, dirty)
             grid[i].append(vertex)
 
     return grid
@@ -207,15 +182,41 @@ def draw_grid(win, rows, width):
         pygame.draw.line(win, GREY, (j * gap, 0), (j * gap, width))
 
 
-def draw(win, grid, rows, width):
-    win.fill(WHITE)
-
-    for row in grid:
-        for vertex in row:
-            vertex.draw(win)
-
-    draw_grid(win,rows, width)
-    pygame.display.update()
+class Renderer: ## repaints only the vertices that changed colour since the last frame
+    def __init__(self, win, rows, width):
+        self.win = win
+        self.dirty = set()
+        self.full = True # repaint everything on the next frame (first frame, new grid)
+        self.last_frame = -1 << 30
+        # the grid lines never change, so draw them once onto a see-through layer
+        self.lines = pygame.Surface((width, width))
+        self.lines.fill(BLUE)
+        draw_grid(self.lines, rows, width)
+        self.lines.set_colorkey(BLUE)
+
+    def draw(self, grid, every=0):
+        now = pygame.time.get_ticks()
+        if now - self.last_frame < every: # too soon, keep collecting changes for the next frame
+            return
+        self.last_frame = now
+        win = self.win
+        if self.full:
+            win.fill(WHITE)
+            for row in grid:
+                for vertex in row:
+                    vertex.draw(win)
+            win.blit(self.lines, (0, 0))
+            pygame.display.update()
+            self.full = False
+        elif self.dirty:
+            rects = []
+            for vertex in self.dirty:
+                rect = pygame.Rect(vertex.x, vertex.y, vertex.width, vertex.width)
+                vertex.draw(win)
+                win.blit(self.lines, rect, rect) # each cell's rect holds its top and left grid line
+                rects.append(rect)
+            pygame.display.update(rects)
+        self.dirty.clear()
 
 
 def get_clicked_pos(pos, rows, width):
@@ -230,14 +231,25 @@ def get_clicked_pos(pos, rows, width):
 
 def main(win, width):
     ROWS = 50 # number of rows
-    grid = make_grid(ROWS, width)
+    renderer = Renderer(win, ROWS, width)
+    clock = pygame.time.Clock()
+    grid = make_grid(ROWS, width, renderer.dirty)
+    walls = Grid(ROWS, ROWS) # what the search sees, kept in step with the barrier vertices
+    planner = None # D* Lite search kept between SPACE presses when INCREMENTAL is on
+
+    def set_wall(row, col, blocked):
+        if walls.is_walkable(row, col) == blocked: # only tell the planner about real changes
+            walls.set_barrier(row, col, blocked)
+            if planner is not None:
+                planner.cells_changed([walls.index(row, col)])
 
     start = None
     end = None
 
     run = True
     while run:
-        draw(win, grid, ROWS, width)
+        renderer.draw(grid)
+        clock.tick(FPS)
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 run = False            
@@ -249,19 +261,23 @@ def main(win, width):
                 if not start and vertex != end:
                     start = vertex
                     start.make_start()
+                    set_wall(row, col, False) # the start may have been drawn over a barrier
                 
                 elif not end and vertex != start:
                     end = vertex
                     end.make_end()
+                    set_wall(row, col, False)
                 
                 elif vertex != end and vertex != start:
                     vertex.make_barrier()
+                    set_wall(row, col, True)
 
             elif pygame.mouse.get_pressed()[2]: #Right
                 pos = pygame.mouse.get_pos()
                 row, col = get_clicked_pos(pos, ROWS, width)
                 vertex = grid[row][col]
                 vertex.reset()
+                set_wall(row, col, False)
                 if vertex == start:
                     start = None
                 elif vertex == end:
@@ -269,15 +285,26 @@ def main(win, width):
 
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE and start and end:
-                    for row in grid:
-                        for vertex in row:
-                            vertex.update_neighbors(grid)
-                    
-                    astar(lambda: draw(win, grid, ROWS, width), grid, start, end)
+                    if INCREMENTAL:
+                        start_index = walls.index(*start.get_pos())
+                        end_index = walls.index(*end.get_pos())
+                        if planner is None or planner.goal != end_index: # the goal is the root of its search
+                            planner = DStarLite(walls, start_index, end_index, HEURISTIC)
+                        elif planner.start != start_index:
+                            planner.move_start(start_index)
+                    stats = SearchStats(trace=True) if PROFILE and planner is None else None
+                    astar(lambda: renderer.draw(grid, 1000 // SEARCH_FPS), grid, walls, start, end, planner, stats)
+                    if stats is not None:
+                        print(stats)
+                        stats.write_trace(PROFILE_TRACE, walls.position)
                 if event.key == pygame.K_c:
                     start = None
                     end = None
-                    grid = make_grid(ROWS, width)
+                    grid = make_grid(ROWS, width, renderer.dirty)
+                    renderer.full = True
+                    walls = Grid(ROWS, ROWS)
+                    planner = None
     pygame.quit()
 
-main(WIN, WIDTH)
\ No newline at end of file
+if __name__ == "__main__":
+    main(WIN, WIDTH)
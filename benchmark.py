@@ -0,0 +1,389 @@
+"""Benchmarks for the headless grid and graph searches.
+
+Run `python benchmark.py` to compare the open-list implementations, the
+heuristics and Jump Point Search on a large maze and a large open field,
+and HPA* against plain A* on a 1024x1024 map of scattered blocks.
+
+`python benchmark.py --suite results.json` runs the regression suite
+instead: every search mode over mazes, random-obstacle grids, open fields
+and sparse random graphs of growing size. For each case it records latency
+percentiles, nodes expanded, peak memory, how much longer the paths are
+than the optimum and how many queries found no path at all. The results
+are written as strict JSON (no Infinity or NaN). With `--baseline
+old.json` the run is compared against an earlier one, and the exit status
+is 1 if anything got worse by more than the tolerance.
+"""
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from dijkstra import shortest_paths
+from graph import GraphBuilder
+from grid_search import HEURISTICS, OPEN_LISTS, Grid, SearchStats, astar_search
+from hpa import Hierarchy
+from jps import JumpTable, jps_search
+from landmarks import Landmarks
+
+
+def open_field(rows, cols):
+    return Grid(rows, cols)
+
+
+def maze(rows, cols, seed=0):
+    """Perfect maze carved by a randomized depth-first search.
+
+    Passages sit on odd coordinates, so even sizes leave a solid last row
+    and column.
+    """
+    rng = random.Random(seed)
+    grid = Grid(rows, cols)
+    grid.cells[:] = bytes(rows * cols)  # start from solid rock
+    grid.set_barrier(1, 1, False)
+    stack = [(1, 1)]
+    while stack:
+        row, col = stack[-1]
+        options = [(row + dr, col + dc, dr, dc) for dr, dc in ((2, 0), (-2, 0), (0, 2), (0, -2))
+                   if 0 < row + dr < rows - 1 and 0 < col + dc < cols - 1
+                   and not grid.is_walkable(row + dr, col + dc)]
+        if not options:
+            stack.pop()
+            continue
+        next_row, next_col, dr, dc = rng.choice(options)
+        grid.set_barrier(row + dr // 2, col + dc // 2, False)
+        grid.set_barrier(next_row, next_col, False)
+        stack.append((next_row, next_col))
+    return grid
+
+
+def scattered_blocks(rows, cols, count, seed=0, largest=30):
+    """Open floor with `count` random rectangular obstacles up to `largest` cells a side."""
+    rng = random.Random(seed)
+    grid = Grid(rows, cols)
+    for _ in range(count):
+        top, left = rng.randrange(rows), rng.randrange(cols)
+        right = min(cols, left + rng.randint(1, largest))
+        for row in range(top, min(rows, top + rng.randint(1, largest))):
+            grid.cells[row * cols + left:row * cols + right] = bytes(right - left)
+    return grid
+
+
+def random_obstacles(rows, cols, density=0.3, seed=0):
+    """Grid where every cell is a barrier with probability `density`."""
+    rng = random.Random(seed)
+    grid = Grid(rows, cols)
+    grid.cells[:] = bytes(rng.random() >= density for _ in range(rows * cols))
+    return grid
+
+
+def sparse_graph(size, degree=4, seed=0):
+    """Connected random graph: a ring plus random chords, about `degree` edges per vertex, weights 1-10."""
+    rng = random.Random(seed)
+    builder = GraphBuilder(size)
+    for u in range(size):
+        builder.add_edge(u, (u + 1) % size, rng.uniform(1, 10))
+    for _ in range(size * (degree - 2) // 2):
+        builder.add_edge(rng.randrange(size), rng.randrange(size), rng.uniform(1, 10))
+    return builder.freeze()
+
+
+def time_query(grid, start, goal, repeat, search=astar_search, **options):
+    best = float("inf")
+    for _ in range(repeat):
+        began = time.perf_counter()
+        result = search(grid, start, goal, **options)
+        best = min(best, time.perf_counter() - began)
+    return best, result
+
+
+def benchmark_maps(size):
+    return {
+        "maze": (maze(size, size), 1, 1, size - 2, size - 2),
+        "open field": (open_field(size, size), 0, 0, size - 1, size - 1),
+    }
+
+
+def compare_open_lists(size=301, repeat=3):
+    maps = benchmark_maps(size)
+    print(f"{'map':<12}{'open list':<10}{'seconds':>10}{'expanded':>10}{'cost':>8}")
+    for name, (grid, start_row, start_col, goal_row, goal_col) in maps.items():
+        start = grid.index(start_row, start_col)
+        goal = grid.index(goal_row, goal_col)
+        for open_list in OPEN_LISTS:
+            seconds, result = time_query(grid, start, goal, repeat, heuristic="manhattan", open_list=open_list)
+            print(f"{name:<12}{open_list:<10}{seconds:>10.4f}{result.nodes_expanded:>10}{result.cost:>8.0f}")
+
+
+def compare_heuristics(size=301, repeat=3, weights=(1.0, 2.0)):
+    maps = benchmark_maps(size)
+    print(f"{'map':<12}{'heuristic':<12}{'weight':>7}{'seconds':>10}{'expanded':>10}{'cost':>8}")
+    for name, (grid, start_row, start_col, goal_row, goal_col) in maps.items():
+        start = grid.index(start_row, start_col)
+        goal = grid.index(goal_row, goal_col)
+        for heuristic in HEURISTICS:
+            for weight in weights:
+                seconds, result = time_query(grid, start, goal, repeat, heuristic=heuristic, weight=weight)
+                print(f"{name:<12}{heuristic:<12}{weight:>7.1f}{seconds:>10.4f}"
+                      f"{result.nodes_expanded:>10}{result.cost:>8.0f}")
+
+
+def compare_jump_point_search(size=301, repeat=3):
+    print(f"{'map':<12}{'moves':<7}{'search':<8}{'seconds':>10}{'expanded':>10}{'cost':>10}")
+    for diagonal in (False, True):
+        for name, (grid, start_row, start_col, goal_row, goal_col) in benchmark_maps(size).items():
+            grid.diagonal = diagonal
+            start = grid.index(start_row, start_col)
+            goal = grid.index(goal_row, goal_col)
+            table = JumpTable(grid)
+            modes = (("A*", astar_search, {}), ("JPS", jps_search, {}), ("JPS+", jps_search, {"table": table}))
+            for mode, search, options in modes:
+                seconds, result = time_query(grid, start, goal, repeat, search, **options)
+                print(f"{name:<12}{8 if diagonal else 4:<7}{mode:<8}{seconds:>10.4f}"
+                      f"{result.nodes_expanded:>10}{result.cost:>10.1f}")
+
+
+def compare_hierarchical(size=1024, queries=10, seed=0):
+    grid = scattered_blocks(size, size, size * size // 400, seed)
+    rng = random.Random(seed)
+    free = [cell for cell in range(grid.size) if grid.cells[cell]]
+    pairs = [(rng.choice(free), rng.choice(free)) for _ in range(queries)]
+    began = time.perf_counter()
+    hierarchy = Hierarchy(grid)
+    hierarchy.precompute()
+    print(f"HPA* abstraction of {size}x{size}: {time.perf_counter() - began:.1f} s")
+    print(f"{'search':<8}{'seconds':>10}{'expanded':>10}{'cost':>10}")
+    totals = {}
+    for mode, search in (("A*", lambda start, goal: astar_search(grid, start, goal)),
+                         ("HPA*", hierarchy.search)):
+        seconds = expanded = cost = 0
+        for start, goal in pairs:
+            began = time.perf_counter()
+            result = search(start, goal)
+            seconds += time.perf_counter() - began
+            if result.found:
+                expanded += result.nodes_expanded
+                cost += result.cost
+        totals[mode] = seconds, cost
+        print(f"{mode:<8}{seconds / queries:>10.4f}{expanded // queries:>10}{cost / queries:>10.1f}")
+    print(f"HPA* is {totals['A*'][0] / totals['HPA*'][0]:.1f}x faster, "
+          f"paths {totals['HPA*'][1] / totals['A*'][1] - 1:.1%} longer")
+
+
+# The regression suite. A mode is set up once per map (untimed apart from
+# setup_seconds) and returns two query functions: one giving (cost, nodes
+# expanded) and one that is timed, the same function unless counting slows
+# the search down. The first mode of each kind is the optimal
+# reference the others are checked against.
+
+def _answers(search):
+    def query(start, goal):
+        result = search(start, goal)
+        return result.cost, result.nodes_expanded
+    return query, query
+
+
+def _jump_point_table(grid):
+    table = JumpTable(grid)
+    return _answers(lambda start, goal: jps_search(grid, start, goal, table=table))
+
+
+def _hierarchical(grid):
+    hierarchy = Hierarchy(grid)
+    hierarchy.precompute()
+    return _answers(hierarchy.search)
+
+
+def _dijkstra(csr):
+    def counted(start, goal):
+        stats = SearchStats()
+        distances, _ = shortest_paths(csr, start, goal, stats=stats)
+        return distances[goal], stats.expansions
+
+    return counted, lambda start, goal: shortest_paths(csr, start, goal)
+
+
+def _landmarks(csr):
+    return _answers(Landmarks.build(csr, seed=0).search)
+
+
+GRID_MAPS = {
+    "maze": lambda size, seed: maze(size | 1, size | 1, seed),
+    "random": lambda size, seed: random_obstacles(size, size, 0.3, seed),
+    "open field": lambda size, seed: open_field(size, size),
+}
+GRID_MODES = {
+    "astar": lambda grid: _answers(lambda start, goal: astar_search(grid, start, goal)),
+    "jps": lambda grid: _answers(lambda start, goal: jps_search(grid, start, goal)),
+    "jps+": _jump_point_table,
+    "hpa": _hierarchical,
+}
+GRAPH_MAPS = {
+    "sparse": sparse_graph,
+}
+GRAPH_MODES = {
+    "dijkstra": _dijkstra,
+    "alt": _landmarks,
+}
+# (key in each case, how much worse it may get before compare_runs() reports it)
+TRACKED = (("latency_p50", 0.25), ("latency_p90", 0.25), ("nodes_expanded", 0.05), ("peak_kib", 0.25),
+           ("optimality_mean", 0.001), ("failures", 0.0))
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list, e.g. fraction=0.9 for p90."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+def _pick_pairs(query, cells, count, rng):
+    # only pairs the reference search can connect, so every mode answers the same questions
+    pairs = []
+    for _ in range(count * 20):
+        start, goal = rng.choice(cells), rng.choice(cells)
+        cost, _ = query(start, goal)
+        if cost != float("inf"):
+            pairs.append((start, goal, cost))
+            if len(pairs) == count:
+                break
+    return pairs
+
+
+def _measure(query, timed, pairs, repeat):
+    latencies = []
+    expanded = []
+    ratios = []
+    failures = 0
+    for start, goal, best in pairs:
+        fastest = float("inf")
+        for _ in range(repeat):  # best of a few, so a busy machine does not read as a regression
+            began = time.perf_counter()
+            timed(start, goal)
+            fastest = min(fastest, time.perf_counter() - began)
+        latencies.append(fastest)
+        cost, nodes = query(start, goal)
+        expanded.append(nodes)
+        if cost == float("inf"):
+            failures += 1  # kept out of the ratios, which would otherwise turn into inf
+        else:
+            ratios.append(cost / best if best else 1.0)
+    # a separate pass for memory, tracemalloc slows everything down too much to time under it
+    tracemalloc.start()
+    peak = 0
+    for start, goal, _ in pairs[:3]:
+        tracemalloc.reset_peak()
+        timed(start, goal)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+    return {
+        "queries": len(pairs),
+        "latency_mean": sum(latencies) / len(latencies),
+        "latency_p50": percentile(latencies, 0.5),
+        "latency_p90": percentile(latencies, 0.9),
+        "latency_p99": percentile(latencies, 0.99),
+        "latency_max": max(latencies),
+        "nodes_expanded": sum(expanded) / len(expanded),
+        "peak_kib": peak / 1024,
+        # over the queries that found a path; None (null) if none did
+        "optimality_mean": sum(ratios) / len(ratios) if ratios else None,
+        "optimality_max": max(ratios) if ratios else None,
+        "failures": failures,
+    }
+
+
+def run_suite(grid_sizes=(64, 128, 256), graph_sizes=(1000, 10000, 50000), queries=20, repeat=3, seed=0,
+              verbose=True):
+    """Run every mode on every map and size; returns a JSON-ready dict of results."""
+    cases = []
+    plan = [("grid", name, build, size, GRID_MODES) for name, build in GRID_MAPS.items() for size in grid_sizes]
+    plan += [("graph", name, build, size, GRAPH_MODES) for name, build in GRAPH_MAPS.items() for size in graph_sizes]
+    if verbose:
+        print(f"{'map':<12}{'size':>7} {'mode':<10}{'setup':>8}{'p50 ms':>9}{'p90 ms':>9}"
+              f"{'expanded':>10}{'peak KiB':>10}{'optimal':>9}{'failed':>7}")
+    for kind, name, build, size, modes in plan:
+        graph = build(size, seed)
+        rng = random.Random(seed)
+        if kind == "grid":
+            cells = [cell for cell in range(graph.size) if graph.cells[cell]]
+        else:
+            cells = range(graph.size)
+        pairs = None
+        for mode, setup in modes.items():
+            began = time.perf_counter()
+            query, timed = setup(graph)
+            setup_seconds = time.perf_counter() - began
+            if pairs is None:
+                pairs = _pick_pairs(query, cells, queries, rng)
+            if not pairs:
+                break
+            case = {"kind": kind, "map": name, "size": size, "mode": mode, "setup_seconds": setup_seconds}
+            case.update(_measure(query, timed, pairs, repeat))
+            cases.append(case)
+            if verbose:
+                print(f"{name:<12}{size:>7} {mode:<10}{setup_seconds:>8.2f}{case['latency_p50'] * 1000:>9.2f}"
+                      f"{case['latency_p90'] * 1000:>9.2f}{case['nodes_expanded']:>10.0f}"
+                      f"{case['peak_kib']:>10.0f}{case['optimality_mean'] or math.nan:>9.3f}{case['failures']:>7}")
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": seed,
+        "queries": queries,
+        "repeat": repeat,
+        "cases": cases,
+    }
+
+
+def compare_runs(baseline, current, tolerances=TRACKED):
+    """Cases in `current` that got worse than in `baseline`, as printable lines.
+
+    Cases are matched on (map, size, mode); a metric is reported when it
+    grew by more than its relative tolerance. Metrics missing or null on
+    either side are skipped.
+    """
+    before = {(case["map"], case["size"], case["mode"]): case for case in baseline["cases"]}
+    worse = []
+    for case in current["cases"]:
+        old = before.get((case["map"], case["size"], case["mode"]))
+        if old is None:
+            continue
+        for key, tolerance in tolerances:
+            if old.get(key) is None or case.get(key) is None:
+                continue
+            if case[key] > old[key] * (1 + tolerance):
+                change = f" ({case[key] / old[key] - 1:+.0%})" if old[key] else ""
+                worse.append(f"{case['map']} {case['size']} {case['mode']}: {key} "
+                             f"{old[key]:.4g} -> {case[key]:.4g}{change}")
+    return worse
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--suite", metavar="JSON", help="run the regression suite and write its results here")
+    parser.add_argument("--baseline", metavar="JSON", help="results of an earlier --suite run to compare against")
+    parser.add_argument("--queries", type=int, default=20, help="queries per case (default 20)")
+    parser.add_argument("--quick", action="store_true", help="only the smallest sizes")
+    args = parser.parse_args()
+    if not args.suite:
+        compare_open_lists()
+        print()
+        compare_heuristics()
+        print()
+        compare_jump_point_search()
+        print()
+        compare_hierarchical()
+        sys.exit()
+
+    sizes = {"grid_sizes": (64,), "graph_sizes": (1000,)} if args.quick else {}
+    results = run_suite(queries=args.queries, **sizes)
+    with open(args.suite, "w") as file:
+        json.dump(results, file, indent=1, allow_nan=False)
+    if args.baseline:
+        with open(args.baseline) as file:
+            worse = compare_runs(json.load(file), results)
+        print()
+        print("\n".join(worse) if worse else "no regressions against " + args.baseline)
+        sys.exit(1 if worse else 0)
@@ -1,92 +1,215 @@
-class Graph:
-    def __init__(self, size):
-        self.adj_matrix = [[0] * size for _ in range(size)]
-        self.size = size
-        self.vertex_data = [''] * size
-
-    def add_edge(self, u, v, weight):
-        if 0 <= u < self.size and 0 <= v < self.size:
-            self.adj_matrix[u][v] = weight
-            self.adj_matrix[v][u] = weight  # For undirected graph
-
-    def add_vertex_data(self, vertex, data):
-        if 0 <= vertex < self.size:
-            self.vertex_data[vertex] = data
-
-    def dijkstra(self, start_vertex_data):
-        # Find the index of the starting vertex based on its name
-        start_vertex = self.vertex_data.index(start_vertex_data)
-
-        # Create a list to store the shortest known distance to each vertex
-        # Initially, set all distances to infinity (unknown)
-        distances = [float('inf')] * self.size
-
-        # The distance to the start vertex itself is 0
+import heapq
+import time
+
+import graph
+
+
+def shortest_paths(csr, start_vertex, end_vertex=None, stats=None):
+    """Dijkstra over a CSRGraph, returning (distances, predecessors) by vertex id.
+
+    A grid_search.SearchStats passed as `stats` gets this run's counters and timings.
+    """
+    if stats is not None:
+        began = time.perf_counter()
+    offsets, targets, weights = csr.offsets, csr.targets, csr.weights
+
+    # Shortest known distance to each vertex, infinity until we reach it
+    distances = [float('inf')] * csr.size
+    distances[start_vertex] = 0
+
+    # The vertex we came from on the shortest known path, for rebuilding paths later
+    predecessors = [None] * csr.size
+
+    # Vertices whose shortest distance is already final
+    visited = [False] * csr.size
+
+    # Binary heap of (distance, vertex) so the closest unvisited vertex
+    # comes out in O(log V) instead of scanning every vertex
+    queue = [(0, start_vertex)]
+    push, pop = heapq.heappush, heapq.heappop
+    if stats is not None:
+        push, pop = _counting(stats, visited, offsets, end_vertex)
+        stats.pushes += 1  # the start vertex
+        stats.max_open = max(stats.max_open, 1)
+        searched = time.perf_counter()
+
+    while queue:
+        distance, u = pop(queue)
+
+        # A vertex can be in the heap several times; only the first (shortest) copy counts
+        if visited[u]:
+            continue
+        visited[u] = True
+
+        # If an end vertex is given we can stop as soon as its distance is final
+        if u == end_vertex:
+            break
+
+        # Only look at the vertices actually connected to u
+        for i in range(offsets[u], offsets[u + 1]):
+            v = targets[i]
+            if not visited[v]:
+                alt = distance + weights[i]
+                if alt < distances[v]:
+                    distances[v] = alt
+                    predecessors[v] = u
+                    push(queue, (alt, v))
+
+    if stats is not None:
+        stats._add_time("setup", searched - began)
+        stats._add_time("search", time.perf_counter() - searched)
+    # With an end vertex, only that vertex (and the ones visited before it) are final
+    return distances, predecessors
+
+
+def _counting(stats, visited, offsets, end_vertex):
+    # heappush/heappop that also fill in stats; the vertex popped is expanded
+    # unless it was visited already, and its edges are looked at unless it is the end
+    trace = stats.trace
+
+    def push(heap, item):
+        heapq.heappush(heap, item)
+        stats.pushes += 1
+        if len(heap) > stats.max_open:
+            stats.max_open = len(heap)
+
+    def pop(heap):
+        item = heapq.heappop(heap)
+        u = item[1]
+        stats.pops += 1
+        if visited[u]:
+            stats.stale_pops += 1
+        else:
+            if trace is not None:
+                trace.append(u)
+            if u != end_vertex:
+                stats.expansions += 1
+                stats.relaxations += offsets[u + 1] - offsets[u]
+        return item
+
+    return push, pop
+
+
+def multi_source_shortest_paths(csr, start_vertices):
+    """One Dijkstra pass that starts from every vertex in start_vertices at once.
+
+    Returns (distances, predecessors, nearest) where distances[v] is the
+    distance from v to its closest start vertex and nearest[v] is that
+    start vertex, e.g. the nearest facility to every vertex of a road network.
+    """
+    offsets, targets, weights = csr.offsets, csr.targets, csr.weights
+    distances = [float('inf')] * csr.size
+    predecessors = [None] * csr.size
+    nearest = [None] * csr.size
+    visited = [False] * csr.size
+
+    # Every start vertex goes into the heap at distance 0, as if joined to one virtual source
+    queue = []
+    for start_vertex in start_vertices:
         distances[start_vertex] = 0
-
-        # Keep track of which vertices have been visited
-        visited = [False] * self.size
-
-        # Loop to process each vertex
-        for _ in range(self.size):
-            # Start by assuming no unvisited vertex has a small distance
-            min_distance = float('inf')
-            u = None  # This will hold the closest unvisited vertex
-
-            # Find the unvisited vertex with the smallest known distance
-            for i in range(self.size):
-                if not visited[i] and distances[i] < min_distance:
-                    min_distance = distances[i]
-                    u = i  # Store the index of this closest vertex
-
-            # If we didn't find any reachable unvisited vertex, exit the loop
-            if u is None:
-                break
-
-            # Mark this vertex as visited, meaning its shortest distance is finalized
-            visited[u] = True
-
-            # Check all neighbors of this vertex
-            for v in range(self.size):
-                # If there's a connection (non-zero weight) and the neighbor isn't visited
-                if self.adj_matrix[u][v] != 0 and not visited[v]:
-                    # Calculate the new possible shortest distance via vertex `u`
-                    alt = distances[u] + self.adj_matrix[u][v]
-
-                    # If this new distance is shorter, update it
-                    if alt < distances[v]:
-                        distances[v] = alt
-
-        # Return the final list of shortest distances from the start vertex
-        return distances
-
-
-g = Graph(7)
-
-g.add_vertex_data(0, 'A')
-g.add_vertex_data(1, 'B')
-g.add_vertex_data(2, 'C')
-g.add_vertex_data(3, 'D')
-g.add_vertex_data(4, 'E')
-g.add_vertex_data(5, 'F')
-g.add_vertex_data(6, 'G')
-
-g.add_edge(3, 0, 4)  # D - A, weight 4
-g.add_edge(3, 4, 2)  # D - E, weight 2
-g.add_edge(0, 2, 3)  # A - C, weight 3
-g.add_edge(0, 4, 4)  # A - E, weight 4
-g.add_edge(2, 4, 4)  # C - E, weight 4
-g.add_edge(4, 6, 5)  # E - G, weight 5
-g.add_edge(2, 5, 5)  # C - F, weight 5
-g.add_edge(2, 1, 2)  # C - B, weight 2
-g.add_edge(1, 5, 2)  # B - F, weight 2
-g.add_edge(6, 5, 5)  # G - F, weight 5
-
-# Start Dijkstra's algorithm from vertex 'D' and show the results
-print("Dijkstra's Algorithm starting from vertex D:\n")  # Print a message before showing distances
-
-distances = g.dijkstra('D')  # Run Dijkstra’s algorithm starting from 'D' to find shortest paths
-
-# Go through each vertex and display the shortest distance from 'D'
-for i, d in enumerate(distances):  
-    print(f"Shortest distance from D to {g.vertex_data[i]}: {d}")  # Show the result in a readable format
+        nearest[start_vertex] = start_vertex
+        queue.append((0, start_vertex))
+    heapq.heapify(queue)
+
+    while queue:
+        distance, u = heapq.heappop(queue)
+        if visited[u]:
+            continue
+        visited[u] = True
+
+        for i in range(offsets[u], offsets[u + 1]):
+            v = targets[i]
+            if not visited[v]:
+                alt = distance + weights[i]
+                if alt < distances[v]:
+                    distances[v] = alt
+                    predecessors[v] = u
+                    nearest[v] = nearest[u]  # v is served by the same start vertex as u
+                    heapq.heappush(queue, (alt, v))
+
+    return distances, predecessors, nearest
+
+
+class Graph(graph.Graph):
+    # Edge storage, add_edge and add_vertex_data come from graph.Graph (CSR arrays)
+
+    def dijkstra(self, start_vertex_data, end_vertex_data=None, stats=None):
+        # Look up the starting (and optional end) vertex by name in O(1);
+        # pass a grid_search.SearchStats to see what the run did
+        start_vertex = self.vertex_id(start_vertex_data)
+        end_vertex = None if end_vertex_data is None else self.vertex_id(end_vertex_data)
+        return shortest_paths(self.csr, start_vertex, end_vertex, stats)
+
+    def dijkstra_many(self, start_vertices_data):
+        # One (distances, predecessors) pair per start vertex, all names resolved up front
+        csr = self.csr
+        return [shortest_paths(csr, start_vertex) for start_vertex in self.vertex_ids(start_vertices_data)]
+
+    def dijkstra_multi_source(self, start_vertices_data):
+        # Distance from every vertex to the closest of the named start vertices, in one pass
+        return multi_source_shortest_paths(self.csr, self.vertex_ids(start_vertices_data))
+
+    def build_landmarks(self, count=8, seed=None):
+        # ALT tables that guide shortest_path(); they belong to the current edges only
+        from landmarks import Landmarks  # landmarks.py imports this module
+        self._landmarks = Landmarks.build(self.csr, count, seed)
+        return self._landmarks
+
+    def shortest_path(self, start_vertex_data, end_vertex_data):
+        # (distance, [names]) between two vertices; with landmarks built this is an A* that
+        # heads straight for the end instead of growing a Dijkstra ball around the start
+        start_vertex = self.vertex_id(start_vertex_data)
+        end_vertex = self.vertex_id(end_vertex_data)
+        landmarks = getattr(self, '_landmarks', None)
+        if landmarks is not None and landmarks.graph is self.csr:
+            result = landmarks.search(start_vertex, end_vertex)
+            if not result.found:
+                return float('inf'), []
+            return result.cost, [self.vertex_data[vertex] for vertex in result.path]
+        distances, predecessors = shortest_paths(self.csr, start_vertex, end_vertex)
+        if distances[end_vertex] == float('inf'):
+            return float('inf'), []
+        return distances[end_vertex], self.get_path(predecessors, end_vertex_data)
+
+    def get_path(self, predecessors, end_vertex_data):
+        # Walk the predecessors back from the end vertex to the start
+        current = self.vertex_id(end_vertex_data)
+        path = []
+        while current is not None:
+            path.append(self.vertex_data[current])
+            current = predecessors[current]
+        path.reverse()
+        return path
+
+
+if __name__ == "__main__":
+    g = Graph(7)
+
+    g.add_vertex_data(0, 'A')
+    g.add_vertex_data(1, 'B')
+    g.add_vertex_data(2, 'C')
+    g.add_vertex_data(3, 'D')
+    g.add_vertex_data(4, 'E')
+    g.add_vertex_data(5, 'F')
+    g.add_vertex_data(6, 'G')
+
+    g.add_edge(3, 0, 4)  # D - A, weight 4
+    g.add_edge(3, 4, 2)  # D - E, weight 2
+    g.add_edge(0, 2, 3)  # A - C, weight 3
+    g.add_edge(0, 4, 4)  # A - E, weight 4
+    g.add_edge(2, 4, 4)  # C - E, weight 4
+    g.add_edge(4, 6, 5)  # E - G, weight 5
+    g.add_edge(2, 5, 5)  # C - F, weight 5
+    g.add_edge(2, 1, 2)  # C - B, weight 2
+    g.add_edge(1, 5, 2)  # B - F, weight 2
+    g.add_edge(6, 5, 5)  # G - F, weight 5
+
+    # Start Dijkstra's algorithm from vertex 'D' and show the results
+    print("Dijkstra's Algorithm starting from vertex D:\n")  # Print a message before showing distances
+
+    distances, predecessors = g.dijkstra('D')  # Run Dijkstra’s algorithm starting from 'D' to find shortest paths
+
+    # Go through each vertex and display the shortest distance and path from 'D'
+    for i, d in enumerate(distances):  
+        path = '->'.join(g.get_path(predecessors, g.vertex_data[i]))
+        print(f"Shortest distance from D to {g.vertex_data[i]}: {d}, path: {path}")  # Show the result in a readable format
@@ -0,0 +1,171 @@
+"""Shortest-path distance tables from many sources, computed in parallel.
+
+The frozen CSR arrays of a graph are copied once into a shared memory block.
+Every worker process maps that block instead of receiving a pickled copy of
+the graph with each task. When a dense matrix is requested the workers
+write their rows straight into a second shared block, so only source ids
+travel through the pool's pipes. A graph saved with graph_io.save_graph()
+can be passed as a file name instead; every worker then maps the file
+itself and nothing is copied at all.
+"""
+from array import array
+from contextlib import contextmanager
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+
+from dijkstra import shortest_paths
+from graph import CSRGraph
+from graph_io import load_csr
+
+
+def _aligned(nbytes):
+    return (nbytes + 7) & ~7
+
+
+class SharedCSR:
+    """A CSRGraph's arrays copied into one shared memory block.
+
+    Use it as a context manager, or call close() when done; the block is
+    removed from the system at that point.
+    """
+
+    def __init__(self, csr):
+        self.size = csr.size
+        self.arcs = len(csr.targets)
+        self.directed = csr.directed
+        offsets_bytes = 8 * (self.size + 1)
+        targets_bytes = _aligned(4 * self.arcs)
+        self.shm = SharedMemory(create=True, size=max(1, offsets_bytes + targets_bytes + 8 * self.arcs))
+        view = _views(self.shm, self.size, self.arcs)
+        view[0][:] = array('q', csr.offsets)
+        view[1][:] = array('i', csr.targets)
+        view[2][:] = array('d', csr.weights)
+        for part in view:
+            part.release()
+
+    @property
+    def spec(self):
+        """Everything a worker needs to map the block again."""
+        return self.shm.name, self.size, self.arcs, self.directed
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _views(shm, size, arcs):
+    offsets_end = 8 * (size + 1)
+    targets_end = offsets_end + _aligned(4 * arcs)
+    buf = shm.buf
+    return (buf[:offsets_end].cast('q'),
+            buf[offsets_end:offsets_end + 4 * arcs].cast('i'),
+            buf[targets_end:targets_end + 8 * arcs].cast('d'))
+
+
+def attach(spec):
+    """Open a SharedCSR block (or a graph file) in this process as a read-only CSRGraph."""
+    if isinstance(spec, str):
+        return load_csr(spec)
+    name, size, arcs, directed = spec
+    shm = SharedMemory(name=name)
+    offsets, targets, weights = _views(shm, size, arcs)
+    graph = CSRGraph(offsets, targets, weights, directed)
+    graph.shm = shm  # keep the mapping alive as long as the graph
+    return graph
+
+
+# Per-worker state, filled in by _init_worker()
+_graph = None
+_matrix = None
+
+
+def _init_worker(spec, matrix_name):
+    global _graph, _matrix
+    _graph = attach(spec)
+    if matrix_name is not None:
+        shm = SharedMemory(name=matrix_name)
+        _matrix = (shm, shm.buf.cast('d'))
+
+
+def _distances_task(source):
+    distances, _ = shortest_paths(_graph, source)
+    return source, array('d', distances)
+
+
+def _matrix_row_task(job):
+    row, source = job
+    distances, _ = shortest_paths(_graph, source)
+    size = _graph.size
+    _matrix[1][row * size:(row + 1) * size] = array('d', distances)
+    return row
+
+
+@contextmanager
+def _worker_spec(graph, csr):
+    # A graph file is mapped again by each worker; anything else is copied into shared memory once
+    if isinstance(graph, str):
+        yield graph
+    else:
+        with SharedCSR(csr) as shared:
+            yield shared.spec
+
+
+def _resolve(graph, sources):
+    # Named graphs accept vertex names (or plain ids); a bare CSRGraph or a graph file takes ids
+    if isinstance(graph, str):
+        graph = load_csr(graph)
+    if isinstance(graph, CSRGraph):
+        return graph, list(sources)
+    ids = [graph.vertex_index[source] if source in graph.vertex_index else source for source in sources]
+    for source, vertex in zip(sources, ids):
+        if not (isinstance(vertex, int) and 0 <= vertex < graph.size):
+            raise ValueError(f"{source!r} is not a vertex name or id")
+    return graph.csr, ids
+
+
+def iter_distances(graph, sources, processes=None):
+    """Yield (source id, distances) for each source as soon as it finishes.
+
+    `graph` is a Graph (sources may be vertex names), a CSRGraph or the
+    path of a graph file. Results arrive in completion order. With
+    processes=1 everything runs in this process without a pool.
+    """
+    csr, ids = _resolve(graph, sources)
+    if processes == 1:
+        for source in ids:
+            distances, _ = shortest_paths(csr, source)
+            yield source, array('d', distances)
+        return
+    with _worker_spec(graph, csr) as spec:
+        with get_context().Pool(processes, _init_worker, (spec, None)) as pool:
+            yield from pool.imap_unordered(_distances_task, ids)
+
+
+def distance_matrix(graph, sources, processes=None):
+    """Dense table: row i holds the distances from sources[i] to every vertex.
+
+    Returns a list of array('d') rows, unreachable vertices are inf.
+    """
+    csr, ids = _resolve(graph, sources)
+    if processes == 1 or not ids:
+        return [array('d', shortest_paths(csr, source)[0]) for source in ids]
+    size = csr.size
+    with _worker_spec(graph, csr) as spec:
+        out = SharedMemory(create=True, size=max(1, 8 * size * len(ids)))
+        try:
+            with get_context().Pool(processes, _init_worker, (spec, out.name)) as pool:
+                for _ in pool.imap_unordered(_matrix_row_task, enumerate(ids)):
+                    pass
+            matrix = out.buf.cast('d')
+            rows = [array('d', matrix[row * size:(row + 1) * size]) for row in range(len(ids))]
+            matrix.release()
+            return rows
+        finally:
+            out.close()
+            out.unlink()
@@ -0,0 +1,208 @@
+"""Incremental replanning with D* Lite.
+
+astar_search() starts from nothing on every query. A DStarLite planner keeps
+its search between queries instead: after a few cells change, only the part
+of the search those cells touch is repaired, and the next query usually
+expands a small fraction of what a fresh search would.
+
+The search runs backwards from the goal. g[node] is the cost from node to
+the goal as last settled, and rhs[node] is the one-step lookahead
+min(step_cost + g[next]) over the node's successors. A node whose g and rhs
+disagree is inconsistent and waits on the open list until compute() settles
+it. An edit only recomputes rhs for the nodes whose outgoing edges changed,
+which is what keeps the repair local. Because the goal is the root of the
+search, the start can move between queries (move_start()) without losing
+anything; a new goal needs a new planner.
+
+    planner = DStarLite(grid, start, goal)
+    planner.compute()
+    grid.set_barrier(row, col)
+    planner.cells_changed([grid.index(row, col)])
+    result = planner.compute()  # repairs around (row, col) only
+"""
+import heapq
+from array import array
+
+from grid_search import HEURISTICS, SearchResult, default_heuristic
+
+INF = float("inf")
+
+
+def _node_position(node):
+    return node
+
+
+class DStarLite:
+    """Cheapest paths from a movable start to a fixed goal, kept up to date across edits.
+
+    `graph` is anything astar_search() accepts: a Grid, or an object with
+    `size` and `neighbors(node)` (and optionally `position(node)` for the
+    heuristic). Edges are taken to run both ways unless the graph is
+    `directed`, in which case its `reversed()` graph supplies predecessors.
+    The heuristic must be consistent, as the default ones are at weight 1.
+    """
+
+    def __init__(self, graph, start, goal, heuristic=None):
+        if heuristic is None:
+            heuristic = default_heuristic(graph)
+        elif isinstance(heuristic, str):
+            heuristic = HEURISTICS[heuristic]
+        self.graph = graph
+        self.start = start
+        self.goal = goal
+        self.heuristic = heuristic
+        self.position = getattr(graph, "position", _node_position)
+        self._reverse = graph.reversed() if getattr(graph, "directed", False) else graph
+        self._start_pos = self.position(start)
+        self.km = 0  # how far the start has moved; keeps old keys valid instead of reordering the heap
+        self.g = array("d", [INF]) * graph.size
+        self.rhs = array("d", self.g)
+        self.rhs[goal] = 0
+        self._heap = []
+        self._queued = {}  # node -> its current key; heap entries that disagree are stale
+        self._push(goal)
+
+    def _key(self, node):
+        best = min(self.g[node], self.rhs[node])
+        # Rounded so that keys that are equal on paper compare equal: with
+        # diagonal steps the sums pick up different rounding errors, and a
+        # key one ulp too big would end the search too early.
+        return round(best + self.heuristic(self._start_pos, self.position(node)) + self.km, 9), best
+
+    def _push(self, node):
+        key = self._key(node)
+        self._queued[node] = key
+        heapq.heappush(self._heap, (key[0], key[1], node))
+        if len(self._heap) > 4 * len(self._queued) + 64:
+            # too many stale entries, rebuild from the live ones
+            self._heap = [(k1, k2, queued) for queued, (k1, k2) in self._queued.items()]
+            heapq.heapify(self._heap)
+
+    def _top(self):
+        heap = self._heap
+        queued = self._queued
+        while heap:
+            k1, k2, node = heap[0]
+            if queued.get(node) == (k1, k2):
+                return heap[0]
+            heapq.heappop(heap)
+        return None
+
+    def _update(self, node):
+        g = self.g
+        rhs = self.rhs
+        if node != self.goal:
+            best = INF
+            for other, step_cost in self.graph.neighbors(node):
+                total = step_cost + g[other]
+                if total < best:
+                    best = total
+            rhs[node] = best
+        if g[node] != rhs[node]:
+            self._push(node)
+            return True
+        self._queued.pop(node, None)
+        return False
+
+    def move_start(self, start):
+        """Plan from a new start; the search built so far stays valid."""
+        position = self.position(start)
+        self.km += self.heuristic(self._start_pos, position)
+        self._start_pos = position
+        self.start = start
+
+    def edges_changed(self, nodes):
+        """Tell the planner that edges leaving `nodes` were added, removed or re-weighted."""
+        for node in nodes:
+            self._update(node)
+
+    def cells_changed(self, cells):
+        """Tell the planner that these Grid cells changed cost or became (un)walkable.
+
+        Stepping onto a cell is what costs, and diagonal moves check the
+        cells they cut past, so the edges affected all leave the 3x3 block
+        around each changed cell.
+        """
+        graph = self.graph
+        rows, cols = graph.rows, graph.cols
+        touched = set()
+        for cell in cells:
+            row, col = divmod(cell, cols)
+            for other_row in range(max(row - 1, 0), min(row + 2, rows)):
+                for other_col in range(max(col - 1, 0), min(col + 2, cols)):
+                    touched.add(other_row * cols + other_col)
+        self.edges_changed(touched)
+
+    def compute(self, observer=None, observe_every=1):
+        """Settle every node that matters for the current start and return its path.
+
+        Returns a SearchResult whose nodes_expanded counts only this call's
+        work. `observer(opened, closed)` works like in astar_search();
+        returning False stops early, and the next compute() carries on.
+        """
+        g = self.g
+        rhs = self.rhs
+        start = self.start
+        queued = self._queued
+        reverse = self._reverse
+        expanded = 0
+        watching = observer is not None
+        opened_batch = []
+        closed_batch = []
+
+        while True:
+            top = self._top()
+            if top is None:
+                break
+            k1, k2, node = top
+            if (k1, k2) >= self._key(start) and rhs[start] == g[start]:
+                break
+            heapq.heappop(self._heap)
+            key = self._key(node)
+            if (k1, k2) < key:
+                self._push(node)  # the start moved since this key was made
+                continue
+            del queued[node]
+            expanded += 1
+            if g[node] > rhs[node]:
+                g[node] = rhs[node]  # overconsistent: the node got cheaper, settle it
+            else:
+                g[node] = INF  # underconsistent: it got dearer, re-evaluate it and its predecessors
+                if self._update(node) and watching:
+                    opened_batch.append(node)
+            for other, _ in reverse.neighbors(node):
+                if self._update(other) and watching:
+                    opened_batch.append(other)
+
+            if watching:
+                closed_batch.append(node)
+                if expanded % observe_every == 0:
+                    if observer(opened_batch, closed_batch) is False:
+                        return SearchResult(None, INF, expanded)
+                    opened_batch = []
+                    closed_batch = []
+
+        if watching:
+            observer(opened_batch, closed_batch)
+        return SearchResult(self.path(), g[start], expanded)
+
+    def path(self):
+        """Nodes from the start to the goal following the settled costs, or None if unreachable."""
+        g = self.g
+        node = self.start
+        if g[node] == INF:
+            return None
+        path = [node]
+        for _ in range(self.graph.size):
+            if node == self.goal:
+                return path
+            best = INF
+            for other, step_cost in self.graph.neighbors(node):
+                total = step_cost + g[other]
+                if total < best:
+                    best = total
+                    node = other
+            if best == INF:
+                return None
+            path.append(node)
+        return None
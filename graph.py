@@ -1,35 +1,220 @@
+from array import array
+from itertools import accumulate
+
+
+class CSRGraph:
+    """Frozen graph in compressed sparse row form.
+
+    The out-edges of vertex u are targets[offsets[u]:offsets[u + 1]], with
+    matching weights. An undirected edge is stored once in each direction,
+    apart from a self-loop, which is stored just once. Everything lives in
+    three typed arrays, so memory grows with V + E.
+    """
+
+    def __init__(self, offsets, targets, weights, directed=False):
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.directed = directed
+        self.size = len(offsets) - 1
+
+    @property
+    def num_edges(self):
+        arcs = len(self.targets)
+        if self.directed:
+            return arcs
+        targets, offsets = self.targets, self.offsets
+        loops = sum(1 for u in range(self.size) for i in range(offsets[u], offsets[u + 1]) if targets[i] == u)
+        return (arcs + loops) // 2
+
+    def degree(self, u):
+        return self.offsets[u + 1] - self.offsets[u]
+
+    def neighbors(self, u):
+        start, end = self.offsets[u], self.offsets[u + 1]
+        return zip(self.targets[start:end], self.weights[start:end])
+
+    def edge_weight(self, u, v):
+        """Weight of the edge u -> v, or None if there is no such edge."""
+        for i in range(self.offsets[u], self.offsets[u + 1]):
+            if self.targets[i] == v:
+                return self.weights[i]
+        return None
+
+    def has_edge(self, u, v):
+        return self.edge_weight(u, v) is not None
+
+    def reversed(self):
+        """The same graph with every edge pointing the other way."""
+        if not self.directed:
+            return self
+        builder = GraphBuilder(self.size, directed=True)
+        for u in range(self.size):
+            for i in range(self.offsets[u], self.offsets[u + 1]):
+                builder.add_edge(self.targets[i], u, self.weights[i])
+        return builder.freeze()
+
+
+class GraphBuilder:
+    """Collects edges in flat arrays and freezes them into a CSRGraph.
+
+    Adding the same edge twice keeps the last weight, just like writing the
+    same cell of an adjacency matrix twice.
+    """
+
+    def __init__(self, size, directed=False):
+        self.size = size
+        self.directed = directed
+        self.sources = array('i')
+        self.targets = array('i')
+        self.weights = array('d')
+
+    @classmethod
+    def from_csr(cls, csr):
+        """A builder holding the edges of a frozen graph, to add more to them."""
+        builder = cls(csr.size, csr.directed)
+        for u in range(csr.size):
+            for i in range(csr.offsets[u], csr.offsets[u + 1]):
+                v = csr.targets[i]
+                if csr.directed or u <= v:  # undirected edges are stored both ways, keep one
+                    builder.add_edge(u, v, csr.weights[i])
+        return builder
+
+    def add_edge(self, u, v, weight=1):
+        if not (0 <= u < self.size and 0 <= v < self.size):
+            raise IndexError(f"edge ({u}, {v}) is outside a graph of {self.size} vertices")
+        self.sources.append(u)
+        self.targets.append(v)
+        self.weights.append(weight)
+
+    def add_edges(self, edges):
+        """Add many (u, v) or (u, v, weight) edges in one call."""
+        for edge in edges:
+            self.add_edge(*edge)
+
+    def freeze(self):
+        size = self.size
+        sources, targets, weights = self.sources, self.targets, self.weights
+        if not self.directed:
+            # each edge's two arcs side by side, so both rows see repeats of
+            # an edge in the order they were added and keep the same last weight
+            edges = len(sources)
+            sources, targets, weights = (array('i', bytes(8 * edges)), array('i', bytes(8 * edges)),
+                                         array('d', bytes(16 * edges)))
+            sources[0::2] = targets[1::2] = self.sources
+            sources[1::2] = targets[0::2] = self.targets
+            weights[0::2] = weights[1::2] = self.weights
+
+        # counting sort by source vertex, keeping insertion order within a row
+        counts = array('q', bytes(8 * (size + 1)))
+        for u in sources:
+            counts[u + 1] += 1
+        offsets = array('q', accumulate(counts))
+        next_slot = array('q', offsets)
+        row_targets = array('i', bytes(4 * len(targets)))
+        row_weights = array('d', bytes(8 * len(weights)))
+        for u, v, weight in zip(sources, targets, weights):
+            slot = next_slot[u]
+            row_targets[slot] = v
+            row_weights[slot] = weight
+            next_slot[u] = slot + 1
+
+        # drop repeated edges, the last weight added wins
+        final_offsets = array('q', [0])
+        final_targets = array('i')
+        final_weights = array('d')
+        for u in range(size):
+            start, end = offsets[u], offsets[u + 1]
+            if end - start > 1:
+                row = dict(zip(row_targets[start:end], row_weights[start:end]))
+                if len(row) < end - start:
+                    final_targets.extend(row.keys())
+                    final_weights.extend(row.values())
+                    final_offsets.append(len(final_targets))
+                    continue
+            final_targets.extend(row_targets[start:end])
+            final_weights.extend(row_weights[start:end])
+            final_offsets.append(len(final_targets))
+        return CSRGraph(final_offsets, final_targets, final_weights, self.directed)
+
+
 class Graph:
-    def __init__(self, size):
-        self.adj_matrix = [[0]*size for i in range(size)]
+    def __init__(self, size, directed=False):
         self.size = size
         self.vertex_data = [''] * size
+        self.vertex_index = {}  # name -> vertex id, the reverse of vertex_data
+        self.builder = GraphBuilder(size, directed)
+        self._csr = None
 
-    def add_edge(self, u, v):
+    def add_edge(self, u, v, weight=1):
         if 0 <= u < self.size and 0 <= v < self.size:
-            self.adj_matrix[u][v] = 1
-            self.adj_matrix[v][u] = 1
+            if self.builder is None:  # loaded from a graph file, the edges only live in the CSR arrays
+                self.builder = GraphBuilder.from_csr(self._csr)
+            self.builder.add_edge(u, v, weight)
+            self._csr = None  # rebuilt on the next query
+
+    def add_edges(self, edges):
+        for edge in edges:
+            self.add_edge(*edge)
 
     def add_vertex_data(self, vertex, data):
         if 0 <= vertex < self.size:
+            owner = self.vertex_index.get(data)
+            if owner is not None and owner != vertex:
+                raise ValueError(f"vertex name {data!r} is already used by vertex {owner}")
+            old = self.vertex_data[vertex]
+            if self.vertex_index.get(old) == vertex:
+                del self.vertex_index[old]  # the vertex is being renamed
             self.vertex_data[vertex] = data
-    
+            self.vertex_index[data] = vertex
+
+    def vertex_id(self, data):
+        """Vertex id for a name in O(1); ValueError if there is no such vertex."""
+        try:
+            return self.vertex_index[data]
+        except KeyError:
+            raise ValueError(f"{data!r} is not a vertex name") from None
+
+    def vertex_ids(self, names):
+        return [self.vertex_id(name) for name in names]
+
+    def add_edges_by_name(self, edges):
+        """Add many (name_u, name_v) or (name_u, name_v, weight) edges."""
+        index = self.vertex_index
+        for u, v, *weight in edges:
+            if u not in index or v not in index:
+                raise ValueError(f"edge ({u!r}, {v!r}) uses an unknown vertex name")
+            self.add_edge(index[u], index[v], *weight)
+
+    @property
+    def csr(self):
+        """The edges frozen into CSR arrays, rebuilt only after edges change."""
+        if self._csr is None:
+            self._csr = self.builder.freeze()
+        return self._csr
+
     def print_graph(self):
         print("Adjacency Matrix:")
-        for row in self.adj_matrix:
+        csr = self.csr
+        for u in range(self.size):
+            row = [0] * self.size
+            for v, weight in csr.neighbors(u):
+                row[v] = int(weight) if weight == int(weight) else weight
             print(' '.join(map(str, row)))
         print('\nVertex Data:')
         for vertex, data in enumerate(self.vertex_data):
             print(f'Vertex {vertex}: {data}')
-        
-
-g = Graph(4)
-g.add_vertex_data(0, 'livingroom')
-g.add_vertex_data(1, 'toilet')
-g.add_vertex_data(2, 'bedroom')
-g.add_vertex_data(3, 'kitchen')
-g.add_edge(0, 1)
-g.add_edge(0, 2)
-g.add_edge(2, 3)
-g.add_edge(1, 2)
-
-g.print_graph()
\ No newline at end of file
+
+
+if __name__ == "__main__":
+    g = Graph(4)
+    g.add_vertex_data(0, 'livingroom')
+    g.add_vertex_data(1, 'toilet')
+    g.add_vertex_data(2, 'bedroom')
+    g.add_vertex_data(3, 'kitchen')
+    g.add_edge(0, 1)
+    g.add_edge(0, 2)
+    g.add_edge(2, 3)
+    g.add_edge(1, 2)
+
+    g.print_graph()
@@ -0,0 +1,567 @@
+"""Headless A* search over grids and graphs.
+
+Nothing in this module touches pygame, so path queries can run in batch jobs
+without a display. The visualizer in a-star.py drives the same engine and
+animates it through the optional observer callback.
+
+Nodes are plain integers. A `Grid` numbers its cells row by row
+(`index = row * cols + col`) and stores them in one flat bytearray, so a
+4096x4096 map costs 16 MB instead of millions of Python objects.
+"""
+import heapq
+import math
+import time
+from array import array
+
+SQRT2 = math.sqrt(2)
+
+
+class Grid:
+    """Flat walkability map of a 4- or 8-connected grid.
+
+    Each cell holds the cost of stepping onto it: 0 is a barrier and 1 is
+    ordinary floor. Higher values (up to 255) make a cell more expensive.
+    With `diagonal=True` a diagonal step costs sqrt(2) times the target
+    cell, and is only allowed when both cells it cuts past are walkable.
+    """
+
+    def __init__(self, rows, cols, barriers=(), diagonal=False):
+        self.rows = rows
+        self.cols = cols
+        self.diagonal = diagonal
+        self.cells = bytearray(b"\x01") * (rows * cols)
+        for row, col in barriers:
+            self.cells[row * cols + col] = 0
+        self._state = None
+
+    @classmethod
+    def from_strings(cls, lines, wall="#", diagonal=False):
+        """Build a grid from text rows where `wall` marks a barrier."""
+        lines = [line for line in lines if line]
+        grid = cls(len(lines), len(lines[0]), diagonal=diagonal)
+        for row, line in enumerate(lines):
+            for col, char in enumerate(line):
+                if char == wall:
+                    grid.cells[row * grid.cols + col] = 0
+        return grid
+
+    @property
+    def size(self):
+        return self.rows * self.cols
+
+    def index(self, row, col):
+        return row * self.cols + col
+
+    def position(self, index):
+        return divmod(index, self.cols)
+
+    def is_walkable(self, row, col):
+        return 0 <= row < self.rows and 0 <= col < self.cols and self.cells[row * self.cols + col] != 0
+
+    def is_uniform(self):
+        """True when every walkable cell costs 1."""
+        return not self.cells.translate(None, b"\x00\x01")
+
+    def set_barrier(self, row, col, blocked=True):
+        self.cells[row * self.cols + col] = 0 if blocked else 1
+
+    def set_cost(self, row, col, cost):
+        self.cells[row * self.cols + col] = cost
+
+    def neighbors(self, index):
+        # Same order as Vertex.update_neighbors() in a-star.py: down, up, right, left
+        cells = self.cells
+        cols = self.cols
+        row, col = divmod(index, cols)
+        found = []
+        if row < self.rows - 1 and cells[index + cols]:
+            found.append((index + cols, cells[index + cols]))
+        if row > 0 and cells[index - cols]:
+            found.append((index - cols, cells[index - cols]))
+        if col < cols - 1 and cells[index + 1]:
+            found.append((index + 1, cells[index + 1]))
+        if col > 0 and cells[index - 1]:
+            found.append((index - 1, cells[index - 1]))
+        if self.diagonal:
+            # no corner cutting: both orthogonal cells next to the diagonal must be open
+            for d_row, d_col in ((1, 1), (1, -1), (-1, 1), (-1, -1)):
+                next_row = row + d_row
+                next_col = col + d_col
+                if 0 <= next_row < self.rows and 0 <= next_col < cols:
+                    target = next_row * cols + next_col
+                    if cells[target] and cells[next_row * cols + col] and cells[row * cols + next_col]:
+                        found.append((target, cells[target] * SQRT2))
+        return found
+
+    def search_state(self):
+        """Scratch arrays shared by every query on this grid."""
+        if self._state is None:
+            self._state = SearchState(self.size)
+        return self._state
+
+
+class SearchState:
+    """Preallocated per-node arrays reused from one query to the next.
+
+    Instead of clearing the arrays before every search, each query gets a
+    new generation number and an entry only counts if its stamp matches.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.g = array("d", bytes(8 * size))
+        self.parent = array("i", bytes(4 * size))
+        self.seen = array("I", bytes(4 * size))
+        self.closed = array("I", bytes(4 * size))
+        self.generation = 0
+
+    def begin(self):
+        self.generation += 1
+        if self.generation == 1 << 32:  # stamps are about to wrap, start over
+            self.seen = array("I", bytes(4 * self.size))
+            self.closed = array("I", bytes(4 * self.size))
+            self.generation = 1
+        return self.generation
+
+    def path_to(self, node):
+        path = [node]
+        parent = self.parent
+        while parent[node] != node:
+            node = parent[node]
+            path.append(node)
+        path.reverse()
+        return path
+
+
+class BinaryHeap:
+    """heapq open list with lazy deletion.
+
+    A node whose score improves is simply pushed again; the search skips
+    the stale copy when it eventually pops. Among equal priorities the
+    newest node pops first, which keeps A* pushing along one path instead of
+    fanning out across a whole plateau of equal f-scores.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._count = 0
+
+    def push(self, node, priority):
+        self._count -= 1
+        heapq.heappush(self._heap, (priority, self._count, node))
+
+    def pop(self):
+        return heapq.heappop(self._heap)[2]
+
+    def __len__(self):
+        return len(self._heap)
+
+
+class IndexedHeap:
+    """Binary heap that tracks where each node sits so it can decrease-key.
+
+    Every node is in the heap at most once, so nothing stale is ever popped.
+    Ties pop newest first, like BinaryHeap.
+    """
+
+    def __init__(self):
+        self._keys = []  # (priority, -insertion count) per slot
+        self._nodes = []
+        self._slot = {}  # node -> index into _keys/_nodes
+        self._count = 0
+
+    def push(self, node, priority):
+        slot = self._slot.get(node)
+        if slot is None:
+            self._count -= 1
+            self._keys.append((priority, self._count))
+            self._nodes.append(node)
+            self._sift_up(len(self._nodes) - 1)
+        elif priority < self._keys[slot][0]:
+            self._keys[slot] = (priority, self._keys[slot][1])
+            self._sift_up(slot)
+
+    def pop(self):
+        keys = self._keys
+        nodes = self._nodes
+        top = nodes[0]
+        del self._slot[top]
+        last_key = keys.pop()
+        last_node = nodes.pop()
+        if nodes:
+            keys[0] = last_key
+            nodes[0] = last_node
+            self._sift_down(0)
+        return top
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def _sift_up(self, slot):
+        keys = self._keys
+        nodes = self._nodes
+        key = keys[slot]
+        node = nodes[slot]
+        while slot > 0:
+            up = (slot - 1) >> 1
+            if keys[up] <= key:
+                break
+            keys[slot] = keys[up]
+            nodes[slot] = nodes[up]
+            self._slot[nodes[slot]] = slot
+            slot = up
+        keys[slot] = key
+        nodes[slot] = node
+        self._slot[node] = slot
+
+    def _sift_down(self, slot):
+        keys = self._keys
+        nodes = self._nodes
+        size = len(nodes)
+        key = keys[slot]
+        node = nodes[slot]
+        while True:
+            child = 2 * slot + 1
+            if child >= size:
+                break
+            if child + 1 < size and keys[child + 1] < keys[child]:
+                child += 1
+            if key <= keys[child]:
+                break
+            keys[slot] = keys[child]
+            nodes[slot] = nodes[child]
+            self._slot[nodes[slot]] = slot
+            slot = child
+        keys[slot] = key
+        nodes[slot] = node
+        self._slot[node] = slot
+
+
+class BucketQueue:
+    """One bucket per integer priority, for grids whose step costs are integers.
+
+    Push and pop are O(1) apart from skipping empty buckets, which a
+    consistent heuristic keeps short because f-scores rarely go down.
+    Priorities must be whole numbers. Like BinaryHeap it relies on lazy
+    deletion, and within a bucket the newest node pops first.
+    """
+
+    def __init__(self):
+        self._buckets = []
+        self._lowest = 0
+        self._size = 0
+
+    def push(self, node, priority):
+        key = int(priority)
+        if key != priority:
+            raise ValueError(f"BucketQueue needs integer priorities, got {priority!r}")
+        buckets = self._buckets
+        if key >= len(buckets):
+            buckets.extend([] for _ in range(key + 1 - len(buckets)))
+        buckets[key].append(node)
+        if key < self._lowest:
+            self._lowest = key
+        self._size += 1
+
+    def pop(self):
+        buckets = self._buckets
+        lowest = self._lowest
+        while not buckets[lowest]:
+            lowest += 1
+        self._lowest = lowest
+        self._size -= 1
+        return buckets[lowest].pop()
+
+    def __len__(self):
+        return self._size
+
+
+OPEN_LISTS = {
+    "binary": BinaryHeap,
+    "indexed": IndexedHeap,
+    "bucket": BucketQueue,
+}
+
+
+class SearchResult:
+    """Outcome of a single path query."""
+
+    def __init__(self, path, cost, nodes_expanded):
+        self.path = path  # list of node ids from start to goal, or None
+        self.cost = cost
+        self.nodes_expanded = nodes_expanded
+
+    @property
+    def found(self):
+        return self.path is not None
+
+    def __repr__(self):
+        return (f"SearchResult(found={self.found}, cost={self.cost}, "
+                f"nodes_expanded={self.nodes_expanded})")
+
+
+class SearchStats:
+    """Counters, phase timings and optionally the expansion order of one query.
+
+    Pass one as `stats=` to astar_search() or dijkstra.shortest_paths().
+    The search then swaps counting wrappers in for its open list and
+    neighbour lookups. Without stats it runs the plain loop, so leaving the
+    hooks in costs nothing.
+
+    With trace=True, `trace` lists the nodes in the order they came off the
+    open list, skipping stale copies; the goal is last when it was reached.
+    Reusing one SearchStats for several queries adds them all up.
+    """
+
+    def __init__(self, trace=False):
+        self.pushes = 0
+        self.pops = 0
+        self.stale_pops = 0  # pops of nodes already expanded through a cheaper copy
+        self.relaxations = 0  # edges looked at from expanded nodes
+        self.expansions = 0
+        self.max_open = 0  # largest open list seen, stale copies included
+        self.timings = {}  # phase -> seconds: "setup", "search" and, when a path was built, "path"
+        self.trace = [] if trace else None
+
+    def _count_open_list(self, push, pop, size, is_stale):
+        """Counting versions of an open list's push and pop; `is_stale(node)` tells stale pops apart."""
+        trace = self.trace
+
+        def counting_push(node, priority):
+            push(node, priority)
+            self.pushes += 1
+            if size() > self.max_open:
+                self.max_open = size()
+
+        def counting_pop():
+            node = pop()
+            self.pops += 1
+            if is_stale(node):
+                self.stale_pops += 1
+            elif trace is not None:
+                trace.append(node)
+            return node
+
+        return counting_push, counting_pop
+
+    def _add_time(self, phase, seconds):
+        self.timings[phase] = self.timings.get(phase, 0) + seconds
+
+    def _count_neighbors(self, neighbors):
+        def counting_neighbors(node):
+            found = list(neighbors(node))  # CSRGraph.neighbors() gives a zip, not a list
+            self.relaxations += len(found)
+            return found
+
+        return counting_neighbors
+
+    def as_dict(self):
+        """The counters and timings as a plain dict, e.g. for JSON."""
+        return {
+            "pushes": self.pushes,
+            "pops": self.pops,
+            "stale_pops": self.stale_pops,
+            "relaxations": self.relaxations,
+            "expansions": self.expansions,
+            "max_open": self.max_open,
+            "timings": dict(self.timings),
+        }
+
+    def write_trace(self, path, position=None):
+        """Write the trace as CSV: step and node, plus `position(node)` columns if given (e.g. grid.position)."""
+        if self.trace is None:
+            raise ValueError("these stats were not recorded with trace=True")
+        with open(path, "w") as file:
+            file.write("step,node,row,col\n" if position else "step,node\n")
+            for step, node in enumerate(self.trace):
+                columns = [step, node]
+                if position:
+                    columns.extend(position(node))
+                file.write(",".join(map(str, columns)) + "\n")
+
+    def __repr__(self):
+        timings = ", ".join(f"{phase}={seconds * 1000:.2f}ms" for phase, seconds in self.timings.items())
+        return (f"SearchStats(expansions={self.expansions}, pushes={self.pushes}, pops={self.pops}, "
+                f"stale_pops={self.stale_pops}, relaxations={self.relaxations}, max_open={self.max_open}, "
+                f"{timings})")
+
+
+def zero_heuristic(p1, p2):
+    return 0  # plain Dijkstra
+
+
+def manhattan(p1, p2):
+    # horizontal plus vertical distance, exact on an open 4-connected grid
+    return abs(p1[0] - p2[0]) + abs(p1[1] - p2[1])
+
+
+def euclidean(p1, p2):
+    # straight-line distance, admissible but loose on a grid
+    return math.hypot(p1[0] - p2[0], p1[1] - p2[1])
+
+
+def chebyshev(p1, p2):
+    # the larger of the two axis distances, exact when diagonals cost 1
+    return max(abs(p1[0] - p2[0]), abs(p1[1] - p2[1]))
+
+
+def octile(p1, p2):
+    # exact on an open 8-connected grid where diagonals cost sqrt(2)
+    d_row = abs(p1[0] - p2[0])
+    d_col = abs(p1[1] - p2[1])
+    return max(d_row, d_col) + (SQRT2 - 1) * min(d_row, d_col)
+
+
+def vertical(p1, p2):
+    # only looks at the row difference
+    return abs(p1[0] - p2[0])
+
+
+def horizontal(p1, p2):
+    # only looks at the column difference
+    return abs(p1[1] - p2[1])
+
+
+HEURISTICS = {
+    "zero": zero_heuristic,
+    "manhattan": manhattan,
+    "euclidean": euclidean,
+    "chebyshev": chebyshev,
+    "octile": octile,
+    "vertical": vertical,
+    "horizontal": horizontal,
+}
+
+
+def register_heuristic(name, heuristic):
+    """Make `heuristic(p1, p2)` selectable by name in astar_search()."""
+    HEURISTICS[name] = heuristic
+
+
+def default_heuristic(graph):
+    """Manhattan for 4-connected grids, octile for 8-connected, zero without positions."""
+    if not hasattr(graph, "position"):
+        return zero_heuristic
+    return octile if getattr(graph, "diagonal", False) else manhattan
+
+
+def _identity(node):
+    return node
+
+
+def astar_search(graph, start, goal, heuristic=None, weight=1.0, observer=None, observe_every=1, state=None,
+                 open_list="binary", stats=None):
+    """Find the cheapest path between node ids `start` and `goal`.
+
+    `graph` needs a `size` and a `neighbors(node)` method returning
+    `(neighbor, step_cost)` pairs; a `Grid` is the usual choice. If it also
+    has `position(node)`, the heuristic is called with positions (for a grid,
+    `(row, col)` tuples), otherwise with node ids.
+
+    `heuristic` is a name from HEURISTICS or a function; by default it is
+    picked by default_heuristic(). A `weight` above 1 turns this into
+    weighted A*: far fewer expansions, and a path at most `weight` times
+    longer than the optimum.
+
+    If given, `observer(opened, closed)` is called after every
+    `observe_every` expansions with the nodes opened and closed since the
+    previous call, and once more when the search ends. Returning False from
+    the observer cancels the search.
+
+    `open_list` is a name from OPEN_LISTS or any class with `push(node,
+    priority)`, `pop()` and `__len__`.
+
+    A SearchStats passed as `stats` is filled in with this query's counters
+    and timings.
+    """
+    if stats is not None:
+        began = time.perf_counter()
+    if heuristic is None:
+        heuristic = default_heuristic(graph)
+    elif isinstance(heuristic, str):
+        heuristic = HEURISTICS[heuristic]
+    if state is None:
+        state = graph.search_state() if hasattr(graph, "search_state") else SearchState(graph.size)
+    generation = state.begin()
+    g_score = state.g
+    parent = state.parent
+    seen = state.seen
+    closed = state.closed
+    position = getattr(graph, "position", _identity)
+    goal_pos = position(goal)
+
+    g_score[start] = 0
+    parent[start] = start
+    seen[start] = generation
+    open_set = OPEN_LISTS[open_list]() if isinstance(open_list, str) else open_list()
+    push = open_set.push
+    pop = open_set.pop
+    neighbors = graph.neighbors
+    if stats is not None:
+        push, pop = stats._count_open_list(push, pop, open_set.__len__, lambda node: closed[node] == generation)
+        neighbors = stats._count_neighbors(neighbors)
+    push(start, weight * heuristic(position(start), goal_pos))
+    expanded = 0
+
+    watching = observer is not None
+    opened_batch = []
+    closed_batch = []
+    if stats is not None:
+        searched = time.perf_counter()
+
+    while open_set:
+        current = pop()
+        if closed[current] == generation:
+            continue  # stale entry, a cheaper copy was already expanded
+
+        if current == goal:
+            if watching:
+                observer(opened_batch, closed_batch)
+            if stats is not None:
+                return _finish(stats, began, searched, expanded, lambda: state.path_to(goal), g_score[goal])
+            return SearchResult(state.path_to(goal), g_score[goal], expanded)
+
+        closed[current] = generation
+        expanded += 1
+        current_g = g_score[current]
+
+        for neighbor, step_cost in neighbors(current):
+            if closed[neighbor] == generation:
+                continue
+            temp_g_score = current_g + step_cost
+            if seen[neighbor] != generation or temp_g_score < g_score[neighbor]:
+                seen[neighbor] = generation
+                g_score[neighbor] = temp_g_score
+                parent[neighbor] = current
+                push(neighbor, temp_g_score + weight * heuristic(position(neighbor), goal_pos))
+                if watching:
+                    opened_batch.append(neighbor)
+
+        if watching:
+            closed_batch.append(current)
+            if expanded % observe_every == 0:
+                if observer(opened_batch, closed_batch) is False:
+                    if stats is not None:
+                        return _finish(stats, began, searched, expanded, None, float("inf"))
+                    return SearchResult(None, float("inf"), expanded)
+                opened_batch = []
+                closed_batch = []
+
+    if watching:
+        observer(opened_batch, closed_batch)
+    if stats is not None:
+        return _finish(stats, began, searched, expanded, None, float("inf"))
+    return SearchResult(None, float("inf"), expanded)
+
+
+def _finish(stats, began, searched, expanded, build_path, cost):
+    # timings and the result of an instrumented astar_search()
+    done = time.perf_counter()
+    stats.expansions += expanded
+    stats._add_time("setup", searched - began)
+    stats._add_time("search", done - searched)
+    if build_path is None:
+        return SearchResult(None, cost, expanded)
+    path = build_path()
+    stats._add_time("path", time.perf_counter() - done)
+    return SearchResult(path, cost, expanded)
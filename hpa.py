@@ -0,0 +1,299 @@
+"""Hierarchical pathfinding (HPA*) for large grids.
+
+The grid is cut into square clusters. Wherever two neighbouring clusters
+share a run of walkable cells along their border, one or two transitions
+are placed on the run: a pair of cells facing each other across the border.
+Those cells are the entrances, and together they form a much smaller
+abstract graph. Entrances on the same border pair are joined by the cost of
+crossing it. Entrances of the same cluster are joined by their cheapest
+path inside the cluster. A query links the start and the goal to the
+entrances of their clusters, runs A* on the abstract graph and then refines
+each abstract step into cells with a small A* confined to one cluster.
+
+Paths have to pass through entrances, so they are near-optimal rather
+than optimal, and how far off depends on the map. On a 1024x1024 map of
+scattered blocks they come out about 2% longer than astar_search()'s. On
+open ground, where the straight line rarely meets an entrance, single
+paths can be 10-30% longer, and plain A* is faster there anyway. Queries
+between nearby cells, and every query on a grid of only a few clusters,
+gain nothing from the abstraction, so they go straight to astar_search()
+(see DIRECT_DISTANCE and MIN_CLUSTERS).
+
+Intra-cluster costs are computed the first time a search reaches a
+cluster and cached, or all at once with precompute(). After editing the
+grid, cells_changed() rescans the borders the edits touch and drops the
+cached costs of those clusters only.
+
+    hierarchy = Hierarchy(grid)
+    result = hierarchy.search(start, goal)
+"""
+import heapq
+
+from grid_search import HEURISTICS, SQRT2, SearchResult, astar_search, default_heuristic
+
+CLUSTER_SIZE = 32
+MAX_ENTRANCE_WIDTH = 6  # runs shorter than this get one transition in the middle, longer ones one at each end
+DIRECT_DISTANCE = 2  # in clusters: endpoints closer than this by the heuristic are searched with plain A*
+MIN_CLUSTERS = 16  # grids cut into fewer clusters than this are always searched with plain A*
+
+
+class ClusterView:
+    """A Grid seen through the bounds of one cluster, for astar_search()."""
+
+    def __init__(self, grid, first_row, first_col, last_row, last_col):
+        self.grid = grid
+        self.first_row = first_row
+        self.first_col = first_col
+        self.last_row = last_row
+        self.last_col = last_col
+        self.size = grid.size
+        self.diagonal = grid.diagonal
+        self.position = grid.position
+        self.search_state = grid.search_state
+
+    def __contains__(self, cell):
+        row, col = divmod(cell, self.grid.cols)
+        return self.first_row <= row <= self.last_row and self.first_col <= col <= self.last_col
+
+    def neighbors(self, cell):
+        return [(other, cost) for other, cost in self.grid.neighbors(cell) if other in self]
+
+
+class Hierarchy:
+    """Cluster abstraction of a Grid, answering near-optimal path queries.
+
+    `inter[cell]` maps an entrance to the entrances facing it across a
+    border, with the cost of the step. `intra[cell]` maps it to the other
+    entrances of its cluster it can reach inside the cluster. Clusters are
+    numbered row by row, like cells.
+    """
+
+    def __init__(self, grid, cluster_size=CLUSTER_SIZE, heuristic=None):
+        self.grid = grid
+        self.cluster_size = cluster_size
+        if heuristic is None:
+            heuristic = default_heuristic(grid)
+        elif isinstance(heuristic, str):
+            heuristic = HEURISTICS[heuristic]
+        self.heuristic = heuristic
+        self.cluster_rows = -(-grid.rows // cluster_size)
+        self.cluster_cols = -(-grid.cols // cluster_size)
+        self.entrances = [set() for _ in range(self.cluster_rows * self.cluster_cols)]
+        self.inter = {}
+        self.intra = {}
+        self.built = set()  # clusters whose intra costs are cached
+        self.transitions = {}  # (cluster, cluster to the right or below) -> [(cell, cell), ...]
+        for cluster in range(len(self.entrances)):
+            cluster_row, cluster_col = divmod(cluster, self.cluster_cols)
+            if cluster_col + 1 < self.cluster_cols:
+                self._scan_border(cluster, cluster + 1)
+            if cluster_row + 1 < self.cluster_rows:
+                self._scan_border(cluster, cluster + self.cluster_cols)
+
+    def cluster_of(self, cell):
+        row, col = divmod(cell, self.grid.cols)
+        return (row // self.cluster_size) * self.cluster_cols + col // self.cluster_size
+
+    def view(self, cluster):
+        size = self.cluster_size
+        cluster_row, cluster_col = divmod(cluster, self.cluster_cols)
+        first_row = cluster_row * size
+        first_col = cluster_col * size
+        return ClusterView(self.grid, first_row, first_col,
+                           min(first_row + size, self.grid.rows) - 1, min(first_col + size, self.grid.cols) - 1)
+
+    def _scan_border(self, cluster, other):
+        """Place transitions along the border between `cluster` and the one right of or below it."""
+        grid = self.grid
+        cells = grid.cells
+        cols = grid.cols
+        side = self.view(cluster)
+        if other == cluster + self.cluster_cols:
+            # the last row of `cluster` faces the first row of `other`
+            pairs = [(side.last_row * cols + col, (side.last_row + 1) * cols + col)
+                     for col in range(side.first_col, side.last_col + 1)]
+        else:
+            pairs = [(row * cols + side.last_col, row * cols + side.last_col + 1)
+                     for row in range(side.first_row, side.last_row + 1)]
+        found = []
+        run = []
+        for pair in pairs + [None]:
+            if pair is not None and cells[pair[0]] and cells[pair[1]]:
+                run.append(pair)
+                continue
+            if run:
+                if len(run) < MAX_ENTRANCE_WIDTH:
+                    found.append(run[len(run) // 2])
+                else:
+                    found.extend((run[0], run[-1]))
+                run = []
+        for cell, facing in found:
+            self._link(cell, facing, cells[facing])
+            self._link(facing, cell, cells[cell])
+            self.entrances[cluster].add(cell)
+            self.entrances[other].add(facing)
+        self.transitions[cluster, other] = found
+
+    def _link(self, cell, other, cost):
+        self.inter.setdefault(cell, {})[other] = cost
+
+    def _clear_border(self, cluster, other):
+        for cell, facing in self.transitions.pop((cluster, other), ()):
+            for node, node_cluster, away in ((cell, cluster, facing), (facing, other, cell)):
+                links = self.inter[node]
+                del links[away]
+                if not links:  # no transition left through this cell
+                    del self.inter[node]
+                    self.entrances[node_cluster].discard(node)
+
+    def _costs_within(self, cluster, source, targets, reverse=False):
+        """Cheapest costs from `source` to `targets` without leaving the cluster.
+
+        Returns a dict that holds at least every reachable target. With
+        reverse=True the costs are from the targets to `source` instead.
+        """
+        view = self.view(cluster)
+        first_row, last_row, first_col, last_col = view.first_row, view.last_row, view.first_col, view.last_col
+        grid = self.grid
+        cells = grid.cells
+        cols = grid.cols
+        dist = {source: 0}
+        heap = [(0, source)]
+        remaining = len(targets) - (source in targets)
+        while heap and remaining:
+            cost, cell = heapq.heappop(heap)
+            if cost > dist[cell]:
+                continue
+            if cell in targets and cell != source:
+                remaining -= 1
+            for other, step_cost in grid.neighbors(cell):
+                if not (first_row <= other // cols <= last_row and first_col <= other % cols <= last_col):
+                    continue
+                if reverse:
+                    # stepping from `other` onto `cell`: same move, priced by the cell entered
+                    diagonal = other // cols != cell // cols and other % cols != cell % cols
+                    step_cost = cells[cell] * SQRT2 if diagonal else cells[cell]
+                total = cost + step_cost
+                if total < dist.get(other, float("inf")):
+                    dist[other] = total
+                    heapq.heappush(heap, (total, other))
+        return dist
+
+    def _build(self, cluster):
+        entrances = self.entrances[cluster]
+        for cell in entrances:
+            dist = self._costs_within(cluster, cell, entrances)
+            self.intra[cell] = {other: dist[other] for other in entrances if other != cell and other in dist}
+        self.built.add(cluster)
+
+    def precompute(self):
+        """Cache the intra-cluster costs of every cluster now instead of on first use."""
+        for cluster in range(len(self.entrances)):
+            if cluster not in self.built:
+                self._build(cluster)
+
+    def abstract_neighbors(self, cell):
+        cluster = self.cluster_of(cell)
+        if cluster not in self.built:
+            self._build(cluster)
+        found = list(self.intra.get(cell, {}).items())
+        found.extend(self.inter.get(cell, {}).items())
+        return found
+
+    def cells_changed(self, cells):
+        """Update the abstraction after these cells changed cost or became (un)walkable.
+
+        Borders next to a changed cell are rescanned and the clusters on
+        both sides lose their cached costs; nothing else is touched.
+        """
+        size = self.cluster_size
+        cols = self.grid.cols
+        clusters = set()
+        borders = set()
+        for cell in cells:
+            cluster = self.cluster_of(cell)
+            clusters.add(cluster)
+            row, col = divmod(cell, cols)
+            cluster_row, cluster_col = divmod(cluster, self.cluster_cols)
+            if col % size == 0 and cluster_col > 0:
+                borders.add((cluster - 1, cluster))
+            if col % size == size - 1 and cluster_col + 1 < self.cluster_cols:
+                borders.add((cluster, cluster + 1))
+            if row % size == 0 and cluster_row > 0:
+                borders.add((cluster - self.cluster_cols, cluster))
+            if row % size == size - 1 and cluster_row + 1 < self.cluster_rows:
+                borders.add((cluster, cluster + self.cluster_cols))
+        for border in borders:
+            clusters.update(border)  # entrances on both sides may come and go
+        for cluster in clusters:
+            if cluster in self.built:
+                self.built.discard(cluster)
+                for cell in self.entrances[cluster]:
+                    self.intra.pop(cell, None)
+        for cluster, other in borders:
+            self._clear_border(cluster, other)
+            self._scan_border(cluster, other)
+
+    def search(self, start, goal):
+        """Near-optimal path between cell ids `start` and `goal` as a SearchResult.
+
+        nodes_expanded counts the abstract search plus the refinement.
+        """
+        grid = self.grid
+        if not (grid.cells[start] and grid.cells[goal]):
+            return SearchResult(None, float("inf"), 0)
+        if (len(self.entrances) < MIN_CLUSTERS or
+                self.heuristic(grid.position(start), grid.position(goal)) < DIRECT_DISTANCE * self.cluster_size):
+            return astar_search(grid, start, goal, self.heuristic)
+        start_cluster = self.cluster_of(start)
+        goal_cluster = self.cluster_of(goal)
+        # link the start and the goal to the entrances of their clusters
+        targets = self.entrances[start_cluster]
+        if start_cluster == goal_cluster:
+            targets = targets | {goal}
+        dist = self._costs_within(start_cluster, start, targets)
+        start_links = {cell: dist[cell] for cell in self.entrances[start_cluster] if cell in dist and cell != start}
+        if start_cluster == goal_cluster and goal in dist:
+            start_links[goal] = dist[goal]
+        dist = self._costs_within(goal_cluster, goal, self.entrances[goal_cluster], reverse=True)
+        goal_links = {cell: dist[cell] for cell in self.entrances[goal_cluster] if cell in dist and cell != goal}
+        abstract = _AbstractGraph(self, start, goal, start_links, goal_links)
+        result = astar_search(abstract, start, goal, self.heuristic)
+        if not result.found:
+            return result
+
+        path = [start]
+        expanded = result.nodes_expanded
+        for cell, other in zip(result.path, result.path[1:]):
+            if other in self.inter.get(cell, ()) and self.cluster_of(cell) != self.cluster_of(other):
+                path.append(other)  # a border crossing is a single step
+                continue
+            piece = astar_search(self.view(self.cluster_of(cell)), cell, other, self.heuristic)
+            path.extend(piece.path[1:])
+            expanded += piece.nodes_expanded
+        return SearchResult(path, result.cost, expanded)
+
+
+class _AbstractGraph:
+    """The abstract graph of a Hierarchy plus one query's start and goal links."""
+
+    def __init__(self, hierarchy, start, goal, start_links, goal_links):
+        self.hierarchy = hierarchy
+        self.start = start
+        self.goal = goal
+        self.start_links = start_links
+        self.goal_links = goal_links
+        grid = hierarchy.grid
+        self.size = grid.size
+        self.position = grid.position
+        self.search_state = grid.search_state
+
+    def neighbors(self, cell):
+        if cell == self.start:
+            found = list(self.start_links.items())
+            found.extend(self.hierarchy.inter.get(cell, {}).items())
+        else:
+            found = self.hierarchy.abstract_neighbors(cell)
+        if cell in self.goal_links:
+            found.append((self.goal, self.goal_links[cell]))
+        return found
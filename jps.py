@@ -0,0 +1,288 @@
+"""Jump Point Search for uniform-cost grids.
+
+JPS finds the same optimal paths as astar_search() on a grid where every
+walkable cell costs 1, but it only puts "jump points" on the open list:
+cells where the path may have to turn. Everything in between is crossed by
+scanning along straight (and, on 8-connected grids, diagonal) lines, so the
+symmetric paths across open areas are never expanded one cell at a time.
+
+JPS+ goes one step further: a JumpTable stores, for every cell and every
+straight direction, how far the scan from that cell would travel. Each
+straight scan then becomes a table lookup plus a check for the goal.
+
+Both work on 4-connected grids and on 8-connected grids without corner
+cutting (the same moves as Grid.neighbors()). Grids with weighted cells fall
+back to astar_search().
+
+On 4-connected grids plain JPS is slower than A* across large open areas.
+A vertical scan there has to stop on any row where it could turn, so at
+every step it probes the whole row both ways; one scan across an open map
+costs O(rows * cols). On an empty 1024x1024 grid a query takes about 470 ms
+against 9 ms for astar_search() and 1.5 ms for JPS+. Caching the probes does
+not help, since each row is walked only once per query anyway. Use JPS+ on
+such maps (building the JumpTable for 1024x1024 takes about 8 s). Plain JPS
+pays off in mazes and cluttered maps, where the probes hit walls quickly.
+"""
+from array import array
+
+from grid_search import HEURISTICS, OPEN_LISTS, SQRT2, SearchResult, astar_search, default_heuristic
+
+
+class JumpTable:
+    """Precomputed straight-line jump distances for JPS+.
+
+    For each cell and direction the table holds either k > 0, meaning the
+    scan stops at a jump point k cells away, or -k <= 0, meaning k free
+    cells lie ahead before a wall or the edge without any jump point. The
+    goal is not baked in, so one table serves every query, but it has to be
+    rebuilt after the grid changes.
+    """
+
+    def __init__(self, grid):
+        self.rows = rows = grid.rows
+        self.cols = cols = grid.cols
+        self.diagonal = grid.diagonal
+        cells = grid.cells
+        typecode = "h" if max(rows, cols) < 1 << 15 else "i"
+        self.east = array(typecode, bytes(array(typecode).itemsize * rows * cols))
+        self.west = array(typecode, self.east)
+        self.south = array(typecode, self.east)
+        self.north = array(typecode, self.east)
+
+        def walkable(row, col):
+            return 0 <= row < rows and 0 <= col < cols and cells[row * cols + col]
+
+        # horizontal scans stop where a cell above or below opens up behind us
+        for row in range(rows):
+            for d_col, table, order in ((1, self.east, range(cols - 1, -1, -1)),
+                                        (-1, self.west, range(cols))):
+                for col in order:
+                    nxt = col + d_col
+                    if not walkable(row, nxt):
+                        continue  # stays 0: nothing free ahead
+                    if ((walkable(row - 1, nxt) and not walkable(row - 1, col))
+                            or (walkable(row + 1, nxt) and not walkable(row + 1, col))):
+                        table[row * cols + col] = 1
+                    else:
+                        ahead = table[row * cols + nxt]
+                        table[row * cols + col] = ahead + 1 if ahead > 0 else ahead - 1
+
+        # vertical scans on a 4-connected grid also stop wherever a horizontal scan would
+        for col in range(cols):
+            for d_row, table, order in ((1, self.south, range(rows - 1, -1, -1)),
+                                        (-1, self.north, range(rows))):
+                for row in order:
+                    nxt = row + d_row
+                    if not walkable(nxt, col):
+                        continue
+                    index = nxt * cols + col
+                    if ((walkable(nxt, col - 1) and not walkable(row, col - 1))
+                            or (walkable(nxt, col + 1) and not walkable(row, col + 1))
+                            or (not self.diagonal and (self.east[index] > 0 or self.west[index] > 0))):
+                        table[row * cols + col] = 1
+                    else:
+                        ahead = table[index]
+                        table[row * cols + col] = ahead + 1 if ahead > 0 else ahead - 1
+
+
+def _sign(value):
+    return (value > 0) - (value < 0)
+
+
+def jps_search(grid, start, goal, heuristic=None, weight=1.0, table=None, state=None, open_list="binary"):
+    """Jump Point Search from `start` to `goal` (cell indices) on a Grid.
+
+    Pass a JumpTable built from the same grid to run JPS+, the mode to use
+    on large open 4-connected maps (see the module docstring). The returned
+    path lists every cell, not just the jump points; `nodes_expanded` counts
+    jump points. If the grid has weighted cells the query is handed to
+    astar_search() unchanged.
+    """
+    if not grid.is_uniform():
+        return astar_search(grid, start, goal, heuristic, weight, state=state, open_list=open_list)
+    if heuristic is None:
+        heuristic = default_heuristic(grid)
+    elif isinstance(heuristic, str):
+        heuristic = HEURISTICS[heuristic]
+    if state is None:
+        state = grid.search_state()
+
+    cells = grid.cells
+    rows = grid.rows
+    cols = grid.cols
+    diagonal = grid.diagonal
+    goal_row, goal_col = divmod(goal, cols)
+    goal_pos = (goal_row, goal_col)
+
+    def walkable(row, col):
+        return 0 <= row < rows and 0 <= col < cols and cells[row * cols + col]
+
+    # Each scan starts at the cell next to (row, col) and returns the index of
+    # the first jump point along the line, or -1 if it runs into a wall.
+    if table is None:
+        def scan_horizontal(row, col, d_col):
+            row_start = row * cols
+            while True:
+                col += d_col
+                if col < 0 or col >= cols:
+                    return -1
+                index = row_start + col
+                if not cells[index]:
+                    return -1
+                if index == goal:
+                    return index
+                # forced neighbour: a cell above or below is open but the one behind it is not
+                if ((row > 0 and cells[index - cols] and not cells[index - cols - d_col])
+                        or (row < rows - 1 and cells[index + cols] and not cells[index + cols - d_col])):
+                    return index
+
+        def scan_vertical(row, col, d_row):
+            step = d_row * cols
+            while True:
+                row += d_row
+                if row < 0 or row >= rows:
+                    return -1
+                index = row * cols + col
+                if not cells[index]:
+                    return -1
+                if index == goal:
+                    return index
+                if ((col > 0 and cells[index - 1] and not cells[index - 1 - step])
+                        or (col < cols - 1 and cells[index + 1] and not cells[index + 1 - step])):
+                    return index
+                # without diagonal moves a vertical run must stop wherever it could turn; these
+                # probes make a scan across open space O(rows * cols), which JPS+ avoids
+                if not diagonal and (scan_horizontal(row, col, 1) >= 0 or scan_horizontal(row, col, -1) >= 0):
+                    return index
+    else:
+        east, west, south, north = table.east, table.west, table.south, table.north
+
+        def scan_horizontal(row, col, d_col):
+            index = row * cols + col
+            ahead = east[index] if d_col > 0 else west[index]
+            reach = ahead if ahead > 0 else -ahead
+            if row == goal_row and 0 < (goal_col - col) * d_col <= reach:
+                return goal
+            return index + ahead * d_col if ahead > 0 else -1
+
+        def scan_vertical(row, col, d_row):
+            index = row * cols + col
+            ahead = south[index] if d_row > 0 else north[index]
+            reach = ahead if ahead > 0 else -ahead
+            if 0 < (goal_row - row) * d_row <= reach:
+                if col == goal_col:
+                    return goal
+                if not diagonal:
+                    # the run passes the goal's row: stop if a horizontal scan from there reaches it
+                    turn = goal_row * cols + col
+                    across = east[turn] if goal_col > col else west[turn]
+                    if abs(goal_col - col) <= abs(across):
+                        return turn
+            return index + ahead * d_row * cols if ahead > 0 else -1
+
+    def jump(row, col, d_row, d_col):
+        if not d_row:
+            return scan_horizontal(row, col, d_col)
+        if not d_col:
+            return scan_vertical(row, col, d_row)
+        while True:
+            # no corner cutting: both cells beside the diagonal step must be open
+            if not (walkable(row + d_row, col) and walkable(row, col + d_col)):
+                return -1
+            row += d_row
+            col += d_col
+            if not walkable(row, col):
+                return -1
+            index = row * cols + col
+            if index == goal:
+                return index
+            if scan_horizontal(row, col, d_col) >= 0 or scan_vertical(row, col, d_row) >= 0:
+                return index
+
+    if diagonal:
+        all_directions = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+    else:
+        all_directions = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+    def directions(row, col, d_row, d_col):
+        # directions worth scanning after arriving at (row, col) moving (d_row, d_col)
+        if not diagonal:
+            if d_col:
+                return ((-1, 0), (1, 0), (0, d_col))
+            return ((0, -1), (0, 1), (d_row, 0))
+        if d_row and d_col:
+            return ((d_row, 0), (0, d_col), (d_row, d_col))
+        found = [(d_row, d_col)]
+        # forced neighbours: a side cell that could not have been reached without passing here
+        if d_col:
+            for side in (-1, 1):
+                if walkable(row + side, col) and not walkable(row + side, col - d_col):
+                    found += ((side, 0), (side, d_col))
+        else:
+            for side in (-1, 1):
+                if walkable(row, col + side) and not walkable(row - d_row, col + side):
+                    found += ((0, side), (d_row, side))
+        return found
+
+    generation = state.begin()
+    g_score = state.g
+    parent = state.parent
+    seen = state.seen
+    closed = state.closed
+    g_score[start] = 0
+    parent[start] = start
+    seen[start] = generation
+    open_set = OPEN_LISTS[open_list]() if isinstance(open_list, str) else open_list()
+    push = open_set.push
+    pop = open_set.pop
+    push(start, weight * heuristic(divmod(start, cols), goal_pos))
+    expanded = 0
+
+    while open_set:
+        current = pop()
+        if closed[current] == generation:
+            continue
+        if current == goal:
+            return SearchResult(_fill_in(state.path_to(goal), cols), g_score[goal], expanded)
+        closed[current] = generation
+        expanded += 1
+        current_g = g_score[current]
+        row, col = divmod(current, cols)
+
+        if parent[current] == current:
+            candidates = all_directions
+        else:
+            parent_row, parent_col = divmod(parent[current], cols)
+            candidates = directions(row, col, _sign(row - parent_row), _sign(col - parent_col))
+
+        for d_row, d_col in candidates:
+            found = jump(row, col, d_row, d_col)
+            if found < 0 or closed[found] == generation:
+                continue
+            found_row, found_col = divmod(found, cols)
+            across = abs(found_row - row)
+            along = abs(found_col - col)
+            # jumps run along one straight or diagonal line
+            temp_g_score = current_g + (across * SQRT2 if across and along else across + along)
+            if seen[found] != generation or temp_g_score < g_score[found]:
+                seen[found] = generation
+                g_score[found] = temp_g_score
+                parent[found] = current
+                push(found, temp_g_score + weight * heuristic((found_row, found_col), goal_pos))
+
+    return SearchResult(None, float("inf"), expanded)
+
+
+def _fill_in(jump_points, cols):
+    """Expand a chain of jump points into the full list of cells."""
+    path = [jump_points[0]]
+    for target in jump_points[1:]:
+        row, col = divmod(path[-1], cols)
+        target_row, target_col = divmod(target, cols)
+        d_row = _sign(target_row - row)
+        d_col = _sign(target_col - col)
+        while (row, col) != (target_row, target_col):
+            row += d_row
+            col += d_col
+            path.append(row * cols + col)
+    return path
@@ -0,0 +1,161 @@
+"""ALT: A* with landmarks and the triangle inequality, for weighted CSR graphs.
+
+A handful of landmark vertices are picked far apart, and the distances
+from every landmark to every vertex (and, on directed graphs, from every
+vertex to every landmark) are stored in typed arrays. For any vertex v,
+target t and landmark L the triangle inequality gives two lower bounds on
+the distance from v to t:
+
+    d(v, t) >= d(L, t) - d(L, v)
+    d(v, t) >= d(v, L) - d(t, L)
+
+The largest of these over the landmarks is a consistent A* heuristic.
+Point-to-point queries then head for the target and settle far fewer
+vertices than a plain Dijkstra from the source. The tables only depend on
+the graph, so they can be saved next to it and loaded again:
+
+    landmarks = Landmarks.build(csr, count=8)
+    landmarks.save("roads.alt")
+    landmarks = Landmarks.load("roads.alt", csr)
+    result = landmarks.search(source, target)
+"""
+import random
+import struct
+from array import array
+
+from dijkstra import multi_source_shortest_paths, shortest_paths
+from grid_search import SearchState, astar_search
+
+ACTIVE_LANDMARKS = 4  # landmarks consulted per query, the ones with the best bound for its endpoints
+FILE_MAGIC = b"ALT1"
+_HEADER = struct.Struct("<4sqqq?")  # magic, vertices, arcs, landmarks, directed
+
+
+def pick_landmarks(csr, count, seed=None):
+    """`count` vertices spread over the graph by farthest-point selection.
+
+    The first landmark is the vertex farthest from a random start, and each
+    next one is the vertex farthest from all landmarks so far. Vertices no
+    landmark reaches count as farthest, so every component gets one.
+    """
+    rng = random.Random(seed)
+    count = min(count, csr.size)
+    if not count:
+        return array('i')
+    chosen = array('i')
+    seeds = [rng.randrange(csr.size)]
+    while len(chosen) < count:
+        distances = multi_source_shortest_paths(csr, seeds)[0]
+        farthest = max(range(csr.size), key=distances.__getitem__)
+        if distances[farthest] == 0:
+            break  # every vertex is already a landmark
+        chosen.append(farthest)
+        seeds = chosen
+    return chosen
+
+
+class Landmarks:
+    """Landmark distance tables for one CSRGraph.
+
+    forward[k][v] is the distance from landmark k to v and backward[k][v]
+    the distance from v back to it; on an undirected graph they are the same
+    arrays. Unreachable entries are infinity.
+    """
+
+    def __init__(self, graph, landmarks, forward, backward):
+        self.graph = graph
+        self.landmarks = landmarks
+        self.forward = forward
+        self.backward = backward
+        self._state = None
+
+    @classmethod
+    def build(cls, csr, count=8, seed=None):
+        """Pick `count` landmarks and run one Dijkstra from each (two on a directed graph)."""
+        landmarks = pick_landmarks(csr, count, seed)
+        forward = [array('d', shortest_paths(csr, landmark)[0]) for landmark in landmarks]
+        if csr.directed:
+            reverse = csr.reversed()  # distances *to* a landmark are distances from it against the arrows
+            backward = [array('d', shortest_paths(reverse, landmark)[0]) for landmark in landmarks]
+        else:
+            backward = forward
+        return cls(csr, landmarks, forward, backward)
+
+    def save(self, path):
+        """Write the tables in a small binary format (machine byte order for the arrays)."""
+        graph = self.graph
+        with open(path, "wb") as file:
+            file.write(_HEADER.pack(FILE_MAGIC, graph.size, len(graph.targets), len(self.landmarks),
+                                    graph.directed))
+            self.landmarks.tofile(file)
+            for table in self.forward:
+                table.tofile(file)
+            if graph.directed:
+                for table in self.backward:
+                    table.tofile(file)
+
+    @classmethod
+    def load(cls, path, csr):
+        """Read tables written by save(); ValueError if they were built for a different graph."""
+        with open(path, "rb") as file:
+            magic, size, arcs, count, directed = _HEADER.unpack(file.read(_HEADER.size))
+            if magic != FILE_MAGIC:
+                raise ValueError(f"{path} is not a landmark file")
+            if (size, arcs, directed) != (csr.size, len(csr.targets), csr.directed):
+                raise ValueError(f"{path} was built for a graph with {size} vertices and {arcs} arcs")
+            landmarks = array('i')
+            landmarks.fromfile(file, count)
+            tables = []
+            for _ in range(count * (2 if directed else 1)):
+                table = array('d')
+                table.fromfile(file, size)
+                tables.append(table)
+        forward = tables[:count]
+        backward = tables[count:] if directed else forward
+        return cls(csr, landmarks, forward, backward)
+
+    def lower_bound(self, source, target):
+        """Best triangle-inequality lower bound on the distance from source to target."""
+        return self.heuristic(target, source, active=len(self.landmarks))(source, target)
+
+    def heuristic(self, target, source=None, active=ACTIVE_LANDMARKS):
+        """A heuristic h(v, target) for astar_search() built from `active` landmarks.
+
+        With a source, the landmarks giving the best bound between source
+        and target are used; otherwise the first `active` ones.
+        """
+        terms = [(self.forward[k][target], self.forward[k], self.backward[k], self.backward[k][target])
+                 for k in range(len(self.landmarks))]
+        if source is not None and active < len(terms):
+            terms.sort(key=lambda term: -_bound(term, source))
+        terms = terms[:active]
+
+        def estimate(vertex, _target):
+            best = 0
+            for to_target, forward, backward, from_target in terms:
+                # d(L, t) - d(L, v) and d(v, L) - d(t, L); NaN from inf - inf
+                # compares False and so is skipped, inf means v cannot reach t
+                bound = to_target - forward[vertex]
+                if bound > best:
+                    best = bound
+                bound = backward[vertex] - from_target
+                if bound > best:
+                    best = bound
+            return best
+
+        return estimate
+
+    def search(self, source, target, active=ACTIVE_LANDMARKS):
+        """Shortest path from source to target by A* over the landmark bounds, as a SearchResult."""
+        if self._state is None:
+            self._state = SearchState(self.graph.size)
+        return astar_search(self.graph, source, target, self.heuristic(target, source, active), state=self._state)
+
+
+def _bound(term, vertex):
+    to_target, forward, backward, from_target = term
+    best = 0
+    for bound in (to_target - forward[vertex], backward[vertex] - from_target):
+        if bound > best:  # False for NaN
+            best = bound
+    return best
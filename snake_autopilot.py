@@ -0,0 +1,277 @@
+"""Autopilot for SnakeGame: A* to the apple, kept safe by a Hamiltonian cycle.
+
+A fixed Hamiltonian cycle visits every cell of the wrapped board once.
+Following it forever never hits the body, but it is slow, so the autopilot
+takes shortcuts: A* looks for a path to the apple that only moves forward
+along the cycle, never past the apple, with the body treated as obstacles
+that expire as the tail moves on. Moving forward and short of the tail
+keeps the body in cycle order with only free cells between the head and
+the tail. A shortcut is only taken if enough of those free cells remain
+after eating (see is_safe()); otherwise the snake walks the cycle for a
+while and tries again.
+
+All of this assumes the autopilot has steered since the game began. When
+it takes over a game in progress (take_over()), the body can lie in any
+order. Until the body is back in cycle order, with room ahead as
+is_safe() requires, it only makes moves that keep a way out past the tail
+(see recover()). It prefers moving on along the cycle, which lines the
+body up behind the head.
+
+A plan is computed once per apple and then replayed one cell per tick, so
+a tick usually costs a deque pop.
+"""
+import heapq
+from array import array
+from collections import deque
+
+from snake_engine import DIRECTIONS, OPPOSITE
+
+SEARCH_BUDGET = 16  # A* gives up after this many expansions per cell of estimated distance
+
+
+def hamiltonian_cycle(width, height):
+    """Cells of a cycle through every cell of a wrapped width x height board.
+
+    Row 0 left to right, then rows 1.. in a snake pattern over columns
+    1..width-1, then back up column 0. The wrap-around edges close the
+    cycle for any board size.
+    """
+    if width == 1 or height == 1:
+        return array('i', range(width * height))
+    cycle = array('i', range(width))
+    for row in range(1, height):
+        cols = range(width - 1, 0, -1) if row % 2 else range(1, width)
+        cycle.extend(row * width + col for col in cols)
+    cycle.extend(row * width for row in range(height - 1, 0, -1))
+    return cycle
+
+
+class Autopilot:
+    """Chooses the direction for each tick of a SnakeGame."""
+
+    def __init__(self, game):
+        self.game = game
+        self.size = game.width * game.height
+        self.cycle = hamiltonian_cycle(game.width, game.height)
+        # place[cell] = how far along the cycle the cell is
+        self.place = array('i', bytes(4 * self.size))
+        for k, cell in enumerate(self.cycle):
+            self.place[cell] = k
+        self.plan = deque()
+        self.plan_apple = None
+        self.plan_from = None
+        self.replans = 0
+        self.recovering = False
+
+    def take_over(self):
+        """Start steering a game that someone else has been steering."""
+        self.plan.clear()
+        self.recovering = True
+
+    def next_direction(self):
+        game = self.game
+        if self.recovering:
+            if not self.in_order():
+                return self.recover()
+            self.recovering = False
+        head = game.head
+        # the cached plan is good while the apple stays put and we are where it expects
+        if not (self.plan and self.plan_apple == game.apple and self.plan_from == head):
+            self.plan = deque(self.find_path() or self.walk())
+            self.plan_apple = game.apple
+            self.replans += 1
+        cell = self.plan.popleft()
+        self.plan_from = cell
+        return self.direction_to(cell)
+
+    def direction_to(self, cell):
+        game = self.game
+        row, col = divmod(game.head, game.width)
+        for direction, (d_row, d_col) in DIRECTIONS.items():
+            # on 2-wide boards two directions reach the same cell; never pick the reversing one
+            if direction != OPPOSITE[game.moved] and game.index(row + d_row, col + d_col) == cell:
+                return direction
+        return game.moved
+
+    def find_path(self):
+        """A* from the head to the apple moving only forward along the cycle.
+
+        Returns the cells to visit, apple last; empty if there is no apple,
+        the search runs out of budget, or the path is not safe.
+        """
+        game = self.game
+        apple = game.apple
+        if apple is None:
+            return []
+        width, height, size = game.width, game.height, self.size
+        place = self.place
+        head = game.head
+        base = place[head]
+        target = (place[apple] - base) % size
+        apple_row, apple_col = divmod(apple, width)
+
+        # The body lies in cycle order behind the head, so the tail is the body
+        # cell with the smallest offset and everything ahead of the head up to it
+        # is free. A cell may be entered on move t only if its offset is below
+        # the tail's offset at that move; the tail moves after `grow` moves.
+        body = game.body
+        tail_offsets = [(place[cell] - base) % size or size for cell in reversed(body)]
+        grow = game.grow
+
+        def limit(t):
+            moved = t - 1 - grow
+            if moved < 0:
+                return tail_offsets[0]
+            if moved >= len(tail_offsets):
+                return size
+            return tail_offsets[moved]
+
+        # the cell behind the head is never allowed first: that would reverse
+        d_row, d_col = DIRECTIONS[OPPOSITE[game.moved]]
+        behind = game.index(head // width + d_row, head % width + d_col)
+
+        def estimate(row, col):
+            # Forward along this cycle mostly means downward, and column 0 is
+            # only reached at the very end, so count rows going down (wrapping)
+            # and columns without wrapping. It can overestimate, but it steers
+            # the search away from the directions the cycle rules out.
+            return (apple_row - row) % height + abs(apple_col - col)
+
+        budget = SEARCH_BUDGET * (estimate(head // width, head % width) + 1)
+        arrival = {head: 0}
+        came_from = {}
+        # ties go to the deeper node, so an open board is crossed in a straight line
+        open_set = [(estimate(head // width, head % width), 0, head)]
+        while open_set:
+            _, t, current = heapq.heappop(open_set)
+            t = -t
+            if current == apple:
+                break
+            budget -= 1
+            if not budget:
+                return []
+            row, col = divmod(current, width)
+            ahead = (place[current] - base) % size
+            for other in (((row - 1) % height) * width + col, row * width + (col + 1) % width,
+                          ((row + 1) % height) * width + col, row * width + (col - 1) % width):
+                step = (place[other] - base) % size
+                # forward along the cycle, not past the apple and not up to the tail
+                if not ahead < step <= target or step >= limit(t + 1):
+                    continue
+                if t == 0 and other == behind:
+                    continue
+                # A cell keeps the time it was first reached at, even if a
+                # quicker route turns up later: arriving earlier finds the tail
+                # further back, which could break the checks already made for
+                # the cells beyond it.
+                if other not in arrival:
+                    arrival[other] = t + 1
+                    came_from[other] = current
+                    heapq.heappush(open_set, (t + 1 + estimate(*divmod(other, width)), -t - 1, other))
+        if apple not in came_from:
+            return []
+        path = [apple]
+        while came_from[path[-1]] != head:
+            path.append(came_from[path[-1]])
+        path.reverse()
+        return path if self.is_safe(path) else []
+
+    def is_safe(self, path):
+        """Whether walking the cycle stays safe after eating at the end of `path`.
+
+        Walking the cycle only runs into the tail if the snake keeps growing
+        until no free cell is left ahead of its head. Free cells skipped by
+        shortcuts (gaps in the body) only come back once the tail has passed
+        them, so after eating the cells ahead must outnumber the snake's
+        length plus the growth still to come. When all free cells lie ahead
+        (no gaps) walking the cycle fills the board safely anyway.
+        """
+        game = self.game
+        size, place = self.size, self.place
+        segments = list(reversed(game.body))  # tail first
+        tail = 0
+        grow = game.grow
+        for cell in path:
+            segments.append(cell)
+            if grow:
+                grow -= 1
+            else:
+                tail += 1
+        grow += 1  # the apple at the end of the path
+        length = len(segments) - tail
+        ahead = ((place[segments[tail]] - place[path[-1]]) % size or size) - 1
+        return ahead == size - length or ahead > length + grow
+
+    def in_order(self):
+        """Whether the body lies in cycle order behind the head, with the room ahead is_safe() asks for."""
+        game = self.game
+        size, place = self.size, self.place
+        tail = place[game.body[-1]]
+        last = -1
+        for cell in reversed(game.body):
+            offset = (place[cell] - tail) % size
+            if offset <= last:
+                return False
+            last = offset
+        length = len(game.body)
+        ahead = size - 1 - last
+        return ahead == size - length or ahead > length + game.grow
+
+    def recover(self):
+        """A move for a body out of cycle order; the direction to take.
+
+        A move is safe if, from the cell it enters, some free cell next to
+        the body can be reached no sooner than that body cell moves out of
+        the way, so the snake can always chase its tail. Among safe moves
+        the one least far ahead along the cycle wins, the next cell of the
+        cycle if it is free; with no safe move, the one with the most free
+        cells reachable.
+        """
+        game = self.game
+        width, height, size = game.width, game.height, self.size
+        body = game.body
+        row, col = divmod(game.head, width)
+        base = self.place[game.head]
+        best, best_score = game.moved, None
+        for direction, (d_row, d_col) in DIRECTIONS.items():
+            cell = game.index(row + d_row, col + d_col)
+            if direction == OPPOSITE[game.moved] or game.occupied[cell]:
+                continue
+            # after the move: growth left, and the body cells from the tail on
+            grow = game.grow - 1 if game.grow else 0
+            if cell == game.apple:
+                grow += 1
+            segments = list(body)[:len(body) if game.grow else -1]
+            # leaves[c] = moves after this one until body cell c is gone
+            leaves = {segment: grow + k + 1 for k, segment in enumerate(reversed(segments))}
+            distance = {cell: 0}
+            queue = deque([cell])
+            safe = not leaves  # a one-cell snake has no tail to chase
+            while queue:
+                current = queue.popleft()
+                r, c = divmod(current, width)
+                for other in (((r - 1) % height) * width + c, r * width + (c + 1) % width,
+                              ((r + 1) % height) * width + c, r * width + (c - 1) % width):
+                    if other in leaves:
+                        safe = safe or distance[current] >= leaves[other]
+                    elif other not in distance and other != cell:
+                        distance[other] = distance[current] + 1
+                        queue.append(other)
+            score = (safe, -((self.place[cell] - base) % size) if safe else len(distance))
+            if best_score is None or score > best_score:
+                best, best_score = direction, score
+        return best
+
+    def walk(self):
+        """A stretch of the plain cycle, long enough to be worth replanning after.
+
+        Each step moves the tail on, so gaps behind it close up and a shortcut
+        that was unsafe may become safe. Without an apple the walk is one step.
+        """
+        game = self.game
+        size, place = self.size, self.place
+        start = place[game.head]
+        steps = 1
+        if game.apple is not None:
+            steps = max(1, min((place[game.apple] - start) % size, len(game.body) // 4 + 1))
+        return [self.cycle[(start + k) % size] for k in range(1, steps + 1)]
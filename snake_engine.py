@@ -0,0 +1,187 @@
+"""Snake game rules without pygame.
+
+Cells are numbered row * width + col. The body is a deque of cells with the
+head on the left, so moving is an appendleft plus a pop. A bytearray marks
+the occupied cells for O(1) collision checks, and a count of the free cells
+tells when the board is full.
+"""
+from array import array
+from collections import deque
+
+# (row, col) change for each direction; the board wraps around at the edges
+DIRECTIONS = {"up": (-1, 0), "right": (0, 1), "down": (1, 0), "left": (0, -1)}
+OPPOSITE = {"up": "down", "down": "up", "left": "right", "right": "left"}
+
+
+class FarthestCells:
+    """Answers "farthest free cell from here" under wrap-around Manhattan distance.
+
+    On a torus the distance only depends on the offset between two cells,
+    so every offset is sorted once, farthest first. A query walks that list
+    from the top and stops at the first free cell, which takes at most one
+    look per occupied cell plus one, however big the board is. Ties go to
+    the smaller row offset, then the smaller column offset.
+    """
+
+    _cache = {}
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        half_row = [min(d, height - d) for d in range(height)]
+        half_col = [min(d, width - d) for d in range(width)]
+        order = sorted(range(width * height),
+                       key=lambda offset: -(half_row[offset // width] + half_col[offset % width]))
+        self.d_row = array('i', (offset // width for offset in order))
+        self.d_col = array('i', (offset % width for offset in order))
+
+    @classmethod
+    def for_board(cls, width, height):
+        """Shared instance per board size; building one is O(width * height log)."""
+        key = (width, height)
+        if key not in cls._cache:
+            cls._cache[key] = cls(width, height)
+        return cls._cache[key]
+
+    def query(self, occupied, cell):
+        """Farthest cell from `cell` whose occupied[] entry is 0, or None if there is none."""
+        width, height = self.width, self.height
+        row, col = divmod(cell, width)
+        d_col = self.d_col
+        for k, d_row in enumerate(self.d_row):
+            other_row = row + d_row
+            if other_row >= height:
+                other_row -= height
+            other_col = col + d_col[k]
+            if other_col >= width:
+                other_col -= width
+            other = other_row * width + other_col
+            if not occupied[other]:
+                return other
+        return None
+
+
+def farthest_reachable(occupied, cell, width, height):
+    """Free cell with the longest shortest path from `cell`, moving around the body.
+
+    Breadth-first search over free cells with wrap-around moves; the last
+    cell reached is the farthest. None if no free cell can be reached.
+    """
+    seen = bytearray(occupied)
+    seen[cell] = 1
+    queue = deque([cell])
+    last = None
+    while queue:
+        current = queue.popleft()
+        row, col = divmod(current, width)
+        for other in (((row - 1) % height) * width + col, row * width + (col + 1) % width,
+                      ((row + 1) % height) * width + col, row * width + (col - 1) % width):
+            if not seen[other]:
+                seen[other] = 1
+                queue.append(other)
+                last = other
+    return last
+
+
+class SnakeGame:
+    """State of one game: body, direction, apple and whether the snake is alive.
+
+    Eating an apple makes the tail stay put on the next move, which grows
+    the snake by one cell. The next apple goes to the free cell farthest
+    from the head: by wrap-around Manhattan distance with
+    placement="farthest", or by path length around the body with
+    placement="reachable".
+    """
+
+    def __init__(self, width=12, height=8, start=(0, 0), apple=None, placement="farthest", direction="up"):
+        if placement not in ("farthest", "reachable"):
+            raise ValueError(f"unknown apple placement {placement!r}")
+        self.width = width
+        self.height = height
+        self.placement = placement
+        self.occupied = bytearray(width * height)
+        self.free = width * height  # cells not covered by the body
+        self.body = deque()
+        self.direction = direction
+        self.moved = direction  # the direction of the last move; turn() may change `direction` before the next
+        self.grow = 0
+        self.alive = True
+        self._occupy(self.index(*start))
+        if apple is None:
+            apple = (height // 2, width // 2)
+        self.apple = self.index(*apple)
+
+    def index(self, row, col):
+        return (row % self.height) * self.width + col % self.width
+
+    def position(self, cell):
+        return divmod(cell, self.width)
+
+    @property
+    def head(self):
+        return self.body[0]
+
+    @property
+    def apple_pos(self):
+        return None if self.apple is None else self.position(self.apple)
+
+    def cells(self):
+        """(row, col) of every body segment, head first."""
+        return [divmod(cell, self.width) for cell in self.body]
+
+    def _occupy(self, cell):
+        self.body.appendleft(cell)
+        self.occupied[cell] = 1
+        self.free -= 1
+
+    def _vacate_tail(self):
+        cell = self.body.pop()
+        self.occupied[cell] = 0
+        self.free += 1
+
+    def turn(self, direction):
+        # The snake cannot reverse into itself. Checking against the last move
+        # rather than the last turn stops two quick presses from doing it anyway
+        if direction != OPPOSITE[self.moved]:
+            self.direction = direction
+
+    def next_cell(self, direction=None):
+        d_row, d_col = DIRECTIONS[direction or self.direction]
+        row, col = divmod(self.head, self.width)
+        return self.index(row + d_row, col + d_col)
+
+    def step(self, direction=None):
+        """Move one cell (turning first if a direction is given); False once the snake is dead."""
+        if not self.alive:
+            return False
+        if direction is not None:
+            self.turn(direction)
+        new_head = self.next_cell()
+        self.moved = self.direction
+
+        # The tail has not moved out of the way yet, so running into it counts
+        if self.occupied[new_head]:
+            self.alive = False
+            return False
+
+        self._occupy(new_head)
+        if self.grow:
+            self.grow -= 1
+        else:
+            self._vacate_tail()
+
+        if new_head == self.apple:
+            self.grow += 1
+            self.apple = self.place_apple()
+        return True
+
+    def place_apple(self):
+        """Where the next apple goes; None when the board is full."""
+        if not self.free:
+            return None
+        if self.placement == "reachable":
+            cell = farthest_reachable(self.occupied, self.head, self.width, self.height)
+            if cell is not None:
+                return cell
+            # boxed in: no free cell can be reached, so fall back to plain distance
+        return FarthestCells.for_board(self.width, self.height).query(self.occupied, self.head)
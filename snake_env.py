@@ -0,0 +1,209 @@
+"""Snake as an environment for agents: reset() / step(action) without a window.
+
+Actions are 0..3 for up, right, down, left; an action that would reverse
+the snake is ignored, just like the arrow keys. Observations are
+(height, width) int8 boards with EMPTY, BODY, HEAD and APPLE cells. Eating
+an apple is worth +1, dying -1, every other step 0.
+
+SnakeEnv plays one game on top of SnakeGame. VecSnakeEnv plays many
+independent boards in lockstep with all state in NumPy arrays; a board
+that ends is reset straight away, so it can be stepped forever.
+"""
+import random
+
+import numpy as np
+
+from snake_engine import SnakeGame
+
+ACTIONS = ("up", "right", "down", "left")
+EMPTY, BODY, HEAD, APPLE = 0, 1, 2, 3
+# (row, col) change per action, in ACTIONS order
+MOVES = np.array([(-1, 0), (0, 1), (1, 0), (0, -1)])
+
+
+class SnakeEnv:
+    """One game of snake, stepped by an agent.
+
+    Every game starts like snake.py: a one-cell snake at the top-left
+    corner heading up. With random_start=True the start cell and direction
+    are drawn from a random.Random(seed) instead. max_steps ends (truncates)
+    a game that runs too long without dying.
+    """
+
+    def __init__(self, width=12, height=8, placement="farthest", random_start=False, max_steps=None, seed=None):
+        self.width = width
+        self.height = height
+        self.placement = placement
+        self.random_start = random_start
+        self.max_steps = max_steps
+        self.rng = random.Random(seed)
+        self.game = None
+        self.steps = 0
+
+    def reset(self):
+        start = (0, 0)
+        if self.random_start:
+            start = (self.rng.randrange(self.height), self.rng.randrange(self.width))
+        direction = self.rng.choice(ACTIONS) if self.random_start else "up"
+        self.game = SnakeGame(self.width, self.height, start=start, placement=self.placement, direction=direction)
+        self.steps = 0
+        return self.observation()
+
+    def observation(self):
+        game = self.game
+        board = np.zeros(self.width * self.height, dtype=np.int8)
+        board[list(game.body)] = BODY
+        board[game.head] = HEAD
+        if game.apple is not None:
+            board[game.apple] = APPLE
+        return board.reshape(self.height, self.width)
+
+    def step(self, action):
+        """Returns (observation, reward, done, info); info["length"] is the snake's length."""
+        game = self.game
+        apple = game.apple
+        alive = game.step(ACTIONS[action])
+        self.steps += 1
+        if not alive:
+            reward = -1.0
+        elif game.head == apple:
+            reward = 1.0
+        else:
+            reward = 0.0
+        truncated = self.max_steps is not None and self.steps >= self.max_steps
+        info = {"length": len(game.body) + game.grow, "truncated": truncated and alive}
+        return self.observation(), reward, not alive or truncated, info
+
+
+class VecSnakeEnv:
+    """`count` independent boards of the same size, stepped together.
+
+    The body of board b is a ring buffer body[b] holding its cells, with
+    the head at body[b, head[b]] and the tail `length[b] - 1` slots behind
+    it; occupied[b] marks its cells. Apples go to the farthest free cell by
+    wrap-around Manhattan distance, with the same tie-breaking as
+    SnakeGame, so every board replays exactly like a SnakeEnv given the
+    same actions.
+    """
+
+    def __init__(self, count, width=12, height=8, random_start=False, max_steps=None, seed=None):
+        self.count = count
+        self.width = width
+        self.height = height
+        self.size = size = width * height
+        self.random_start = random_start
+        self.max_steps = max_steps
+        self.rng = np.random.default_rng(seed)
+        self.body = np.zeros((count, size), dtype=np.int32)
+        self.head = np.zeros(count, dtype=np.int64)
+        self.length = np.zeros(count, dtype=np.int64)
+        self.grow = np.zeros(count, dtype=np.int64)
+        self.direction = np.zeros(count, dtype=np.int64)
+        self.apple = np.zeros(count, dtype=np.int64)
+        self.steps = np.zeros(count, dtype=np.int64)
+        self.occupied = np.zeros((count, size), dtype=bool)
+        self.boards = np.arange(count)
+
+        # Wrap-around distance from a head to every cell, as a function of the
+        # offset (cell - head) taken row by row and column by column
+        rows = np.arange(height)
+        cols = np.arange(width)
+        self._half_row = np.minimum(rows, height - rows)
+        self._half_col = np.minimum(cols, width - cols)
+        self._cell_row = np.repeat(rows, width)
+        self._cell_col = np.tile(cols, height)
+
+    def reset(self, boards=None):
+        """Start new games on the given boards (all of them by default); returns all observations."""
+        if boards is None:
+            boards = self.boards
+        boards = np.asarray(boards)
+        if self.random_start:
+            start = self.rng.integers(0, self.size, len(boards))
+            self.direction[boards] = self.rng.integers(0, 4, len(boards))
+        else:
+            start = np.zeros(len(boards), dtype=np.int64)
+            self.direction[boards] = 0
+        self.occupied[boards] = False
+        self.occupied[boards, start] = True
+        self.head[boards] = 0
+        self.body[boards, 0] = start
+        self.length[boards] = 1
+        self.grow[boards] = 0
+        self.steps[boards] = 0
+        self.apple[boards] = (self.height // 2) * self.width + self.width // 2
+        return self.observation()
+
+    def head_cells(self):
+        return self.body[self.boards, self.head]
+
+    def observation(self):
+        boards = self.boards
+        board = self.occupied.astype(np.int8)
+        board[boards, self.head_cells()] = HEAD
+        has_apple = self.apple >= 0
+        board[boards[has_apple], self.apple[has_apple]] = APPLE
+        return board.reshape(self.count, self.height, self.width)
+
+    def _farthest_free(self, boards, heads):
+        # Key = distance * size - offset index: the largest key is the farthest
+        # cell, ties going to the smallest (row, col) offset like FarthestCells
+        width, height = self.width, self.height
+        d_row = (self._cell_row[None, :] - (heads // width)[:, None]) % height
+        d_col = (self._cell_col[None, :] - (heads % width)[:, None]) % width
+        key = (self._half_row[d_row] + self._half_col[d_col]) * self.size - (d_row * width + d_col)
+        key[self.occupied[boards]] = -1
+        best = key.argmax(axis=1)
+        return np.where(key[np.arange(len(boards)), best] >= 0, best, -1)
+
+    def step(self, actions):
+        """Advance every board one move; returns (observations, rewards, dones, info).
+
+        Boards that died or hit max_steps are reported done and already
+        reset in the returned observations; info["length"] holds the final
+        lengths of those games.
+        """
+        boards = self.boards
+        actions = np.asarray(actions, dtype=np.int64)
+        # ignore actions that would reverse the snake
+        self.direction = np.where(actions == (self.direction + 2) % 4, self.direction, actions)
+
+        heads = self.head_cells()
+        move = MOVES[self.direction]
+        row = (heads // self.width + move[:, 0]) % self.height
+        col = (heads % self.width + move[:, 1]) % self.width
+        new_heads = row * self.width + col
+
+        # the tail has not moved out of the way yet, so running into it counts
+        dead = self.occupied[boards, new_heads]
+        alive = boards[~dead]
+        new_heads = new_heads[~dead]
+        self.head[alive] = (self.head[alive] + 1) % self.size
+        self.body[alive, self.head[alive]] = new_heads
+        self.occupied[alive, new_heads] = True
+
+        growing = self.grow[alive] > 0
+        grown = alive[growing]
+        self.grow[grown] -= 1
+        self.length[grown] += 1
+        moved = alive[~growing]
+        tails = self.body[moved, (self.head[moved] - self.length[moved]) % self.size]
+        self.occupied[moved, tails] = False
+
+        ate = new_heads == self.apple[alive]
+        eaters = alive[ate]
+        self.grow[eaters] += 1
+        if len(eaters):
+            self.apple[eaters] = self._farthest_free(eaters, new_heads[ate])
+
+        rewards = np.zeros(self.count)
+        rewards[eaters] = 1.0
+        rewards[dead] = -1.0
+        self.steps += 1
+        dones = dead.copy()
+        if self.max_steps is not None:
+            dones |= self.steps >= self.max_steps
+        info = {"length": self.length + self.grow, "truncated": dones & ~dead}
+        if dones.any():
+            self.reset(boards[dones])
+        return self.observation(), rewards, dones, info
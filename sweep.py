@@ -0,0 +1,135 @@
+"""Parameter sweeps over the boids constants, run headless in a process pool.
+
+Each configuration is a dict of FlockParams fields (neighbor_radius,
+separation_force, max_speed, ...). grid() and sample() build lists of
+them, sweep() runs every one for a fixed number of steps and measures the
+final flock, and the results are written as one column per parameter and
+metric to a NumPy .npz file:
+
+    configs = grid(separation_force=[0.4, 0.8, 1.6], cohesion_force=[0.01, 0.05])
+    results = sweep(configs, count=200, steps=2000, path="sweep.npz")
+"""
+import itertools
+import time
+from multiprocessing import get_context
+
+import numpy as np
+
+from flock import NUM_FISH, Flock, FlockParams, run
+
+METRICS = ("polarization", "nearest_distance", "clusters")
+
+
+def grid(**values):
+    """Every combination of the given values, e.g. grid(max_speed=[5, 10], jitter=[0, 0.2])."""
+    names = list(values)
+    return [dict(zip(names, combo)) for combo in itertools.product(*values.values())]
+
+
+def sample(count, seed=None, **ranges):
+    """`count` configurations drawn uniformly from (low, high) ranges per parameter."""
+    rng = np.random.default_rng(seed)
+    columns = {name: rng.uniform(low, high, count) for name, (low, high) in ranges.items()}
+    return [{name: float(column[i]) for name, column in columns.items()} for i in range(count)]
+
+
+def polarization(flock):
+    """Length of the mean heading: 1 when every fish swims the same way, near 0 when they scatter."""
+    speed = np.hypot(flock.vel[:, 0], flock.vel[:, 1])
+    moving = speed > 0
+    if not moving.any():
+        return 0.0
+    heading = flock.vel[moving] / speed[moving, None]
+    return float(np.hypot(*heading.mean(axis=0)))
+
+
+def nearest_distance(flock, block=256):
+    """Mean distance from each fish to its nearest neighbour, measured around the wrapped screen."""
+    pos = flock.pos
+    count = len(pos)
+    if count < 2:
+        return float("nan")
+    width, height = flock.params.width, flock.params.height
+    nearest = np.empty(count)
+    # a block of rows at a time keeps the distance matrix small
+    for first in range(0, count, block):
+        rows = pos[first:first + block]
+        dx = pos[None, :, 0] - rows[:, None, 0]
+        dy = pos[None, :, 1] - rows[:, None, 1]
+        dx = (dx + width / 2) % width - width / 2
+        dy = (dy + height / 2) % height - height / 2
+        dist_sq = dx * dx + dy * dy
+        dist_sq[np.arange(len(rows)), np.arange(first, first + len(rows))] = np.inf
+        nearest[first:first + len(rows)] = dist_sq.min(axis=1)
+    return float(np.sqrt(nearest).mean())
+
+
+def clusters(flock):
+    """Number of groups of fish linked by chains of neighbours within NEIGHBOR_RADIUS."""
+    count = len(flock)
+    i, j, _, _, dist_sq = flock.neighbor_pairs()
+    near = dist_sq < flock.params.neighbor_radius ** 2
+    i, j = i[near], j[near]
+    # every fish takes the smallest label among its neighbours until nothing changes
+    labels = np.arange(count)
+    while True:
+        lowest = labels.copy()
+        np.minimum.at(lowest, i, labels[j])
+        lowest = lowest[lowest]  # jump along chains of labels
+        if np.array_equal(lowest, labels):
+            return int(np.unique(labels).size)
+        labels = lowest
+
+
+def _run_config(job):
+    index, config, count, steps, seed = job
+    started = time.perf_counter()
+    flock = Flock.scatter(count, FlockParams(**config), seed=seed)
+    run(flock, steps)
+    return index, (polarization(flock), nearest_distance(flock), clusters(flock),
+                   time.perf_counter() - started)
+
+
+def sweep(configs, count=NUM_FISH, steps=1000, seed=0, processes=None, path=None):
+    """Run every configuration headless and measure the flock after the last step.
+
+    Each run gets its own random stream split off `seed`, so a sweep can be
+    repeated exactly, whatever order the pool finishes the runs in.
+    Returns a dict of columns: the swept parameters, "run" and "seconds",
+    plus one column per name in METRICS. With `path` the columns are also
+    saved with numpy.savez. processes=1 runs everything in this process.
+    """
+    configs = list(configs)
+    for config in configs:
+        FlockParams(**config)  # fail on a misspelled parameter before starting any workers
+    seeds = np.random.SeedSequence(seed).spawn(len(configs))
+    jobs = [(index, config, count, steps, seeds[index]) for index, config in enumerate(configs)]
+    results = [None] * len(configs)
+    if processes == 1 or len(jobs) < 2:
+        for job in jobs:
+            index, values = _run_config(job)
+            results[index] = values
+    else:
+        with get_context().Pool(processes) as pool:
+            for index, values in pool.imap_unordered(_run_config, jobs):
+                results[index] = values
+
+    names = sorted({name for config in configs for name in config})
+    defaults = vars(FlockParams())
+    columns = {"run": np.arange(len(configs))}
+    for name in names:
+        columns[name] = np.array([config.get(name, defaults[name]) for config in configs], dtype=float)
+    for position, name in enumerate(METRICS + ("seconds",)):
+        columns[name] = np.array([values[position] for values in results], dtype=float)
+    if path is not None:
+        np.savez(path, **columns)
+    return columns
+
+
+if __name__ == "__main__":
+    configs = grid(separation_force=[0.4, 0.8, 1.6], alignment_force=[0.05, 0.1, 0.2], cohesion_force=[0.01, 0.05])
+    results = sweep(configs, steps=500)
+    header = [name for name in results if name not in METRICS + ("run", "seconds")] + list(METRICS)
+    print(" ".join(f"{name:>17}" for name in header))
+    for row in range(len(configs)):
+        print(" ".join(f"{results[name][row]:17.3f}" for name in header))
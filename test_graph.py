@@ -0,0 +1,96 @@
+"""Checks for the CSR graph storage and the binary graph file format."""
+import io
+
+import pytest
+
+from dijkstra import Graph as DijkstraGraph
+from graph import Graph, GraphBuilder
+from graph_io import load_csr, load_graph, read_edges, save_graph
+
+
+def arcs(csr):
+    return {u: list(csr.neighbors(u)) for u in range(csr.size)}
+
+
+def test_readding_an_undirected_edge_backwards_replaces_both_arcs():
+    builder = GraphBuilder(3)
+    builder.add_edge(0, 1, 5)
+    builder.add_edge(1, 0, 7)
+    csr = builder.freeze()
+    assert csr.edge_weight(0, 1) == 7.0
+    assert csr.edge_weight(1, 0) == 7.0
+    assert csr.num_edges == 1
+
+
+def test_directed_edges_keep_each_direction_apart():
+    builder = GraphBuilder(2, directed=True)
+    builder.add_edge(0, 1, 5)
+    builder.add_edge(1, 0, 7)
+    builder.add_edge(1, 0, 8)
+    csr = builder.freeze()
+    assert (csr.edge_weight(0, 1), csr.edge_weight(1, 0)) == (5.0, 8.0)
+    assert csr.num_edges == 2
+
+
+def test_self_loops_are_stored_once():
+    builder = GraphBuilder(3)
+    builder.add_edge(0, 1, 2)
+    builder.add_edge(2, 2, 3)
+    builder.add_edge(2, 2, 4)
+    csr = builder.freeze()
+    assert list(csr.neighbors(2)) == [(2, 4.0)]
+    assert csr.num_edges == 2
+    # and they survive a thaw and refreeze unchanged
+    assert arcs(GraphBuilder.from_csr(csr).freeze()) == arcs(csr)
+
+
+def named_graph(directed):
+    graph = Graph(4, directed)
+    for vertex, name in enumerate(["A", "B", "Cé", "D"]):
+        graph.add_vertex_data(vertex, name)
+    graph.add_edges([(0, 1, 2.5), (1, 2, 1), (2, 0, 4), (3, 3, 1)])
+    return graph
+
+
+@pytest.mark.parametrize("directed", [False, True])
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_save_and_load_round_trip(directed, use_mmap, tmp_path):
+    graph = named_graph(directed)
+    path = tmp_path / "graph.csrg"
+    save_graph(graph, path)
+
+    csr = load_csr(path, use_mmap)
+    assert csr.directed == directed
+    assert arcs(csr) == arcs(graph.csr)
+
+    loaded = load_graph(path, use_mmap, graph_class=DijkstraGraph)
+    assert loaded.vertex_data == graph.vertex_data
+    assert loaded.vertex_id("Cé") == 2
+    assert arcs(loaded.csr) == arcs(graph.csr)
+    assert loaded.shortest_path("A", "Cé") == (3.5, ["A", "B", "Cé"])
+    loaded.add_edge(0, 3, 1)  # copies the mapped edges into a builder first
+    assert loaded.csr.edge_weight(0, 3) == 1.0
+    assert loaded.csr.num_edges == graph.csr.num_edges + 1
+
+
+def test_bare_csr_round_trip_has_no_names(tmp_path):
+    csr = named_graph(False).csr
+    path = tmp_path / "edges.csrg"
+    save_graph(csr, path)
+    assert arcs(load_csr(path)) == arcs(csr)
+    assert load_graph(path).vertex_data == [""] * csr.size
+
+
+@pytest.mark.parametrize("contents", [b"", b"CSRG", b"not a graph file at all, honestly", b"CSRG" + bytes(60)])
+def test_bad_files_raise_value_error(contents, tmp_path):
+    path = tmp_path / "bad.csrg"
+    path.write_bytes(contents)
+    with pytest.raises(ValueError):
+        load_csr(path, use_mmap=False)
+
+
+def test_read_edges_names_vertices_in_order():
+    graph = read_edges(io.StringIO("# roads\nx y 2\ny z 3.5\n\nz x\n"))
+    assert graph.vertex_data == ["x", "y", "z"]
+    assert graph.csr.edge_weight(2, 0) == 1.0
+    assert graph.csr.edge_weight(1, 2) == 3.5
@@ -0,0 +1,224 @@
+"""Randomized equivalence checks for the search variants.
+
+Every faster or incremental search is checked against the plain search it
+replaces, on random maps and graphs. Run with `python -m pytest test_search.py`.
+"""
+import math
+import random
+
+import pytest
+
+from dijkstra import shortest_paths
+from dstar_lite import DStarLite
+from graph import GraphBuilder
+from grid_search import Grid, SearchStats, astar_search
+from hpa import Hierarchy
+from jps import JumpTable, jps_search
+from landmarks import Landmarks
+
+INF = float("inf")
+
+
+def random_grid(rows, cols, density, rng, diagonal=False, weighted=False):
+    grid = Grid(rows, cols, diagonal=diagonal)
+    for cell in range(grid.size):
+        if rng.random() < density:
+            grid.cells[cell] = 0
+        elif weighted:
+            grid.cells[cell] = rng.choice((1, 1, 1, 2, 5))
+    return grid
+
+
+def random_pairs(grid, count, rng):
+    cells = [cell for cell in range(grid.size) if grid.cells[cell]]
+    return [(rng.choice(cells), rng.choice(cells)) for _ in range(count)]
+
+
+def path_cost(grid, path):
+    """Cost of walking `path` one legal move at a time; fails on an illegal move."""
+    total = 0
+    for cell, other in zip(path, path[1:]):
+        steps = dict(grid.neighbors(cell))
+        assert other in steps, f"{grid.position(cell)} -> {grid.position(other)} is not a move"
+        total += steps[other]
+    return total
+
+
+def assert_same_answer(grid, result, reference, start, goal):
+    assert result.found == reference.found
+    if reference.found:
+        assert result.cost == pytest.approx(reference.cost)
+        assert result.path[0] == start and result.path[-1] == goal
+        assert path_cost(grid, result.path) == pytest.approx(result.cost)
+
+
+@pytest.mark.parametrize("diagonal", [False, True])
+def test_jump_point_search_matches_astar(diagonal):
+    rng = random.Random(5)
+    for trial in range(30):
+        grid = random_grid(rng.randrange(2, 40), rng.randrange(2, 40), rng.choice((0.1, 0.25, 0.4)), rng, diagonal)
+        if not any(grid.cells):
+            continue
+        table = JumpTable(grid)
+        for start, goal in random_pairs(grid, 10, rng):
+            reference = astar_search(grid, start, goal)
+            assert_same_answer(grid, jps_search(grid, start, goal), reference, start, goal)
+            assert_same_answer(grid, jps_search(grid, start, goal, table=table), reference, start, goal)
+
+
+@pytest.mark.parametrize("diagonal", [False, True])
+def test_dstar_lite_matches_astar_across_edits_and_moves(diagonal):
+    rng = random.Random(7)
+    for trial in range(12):
+        grid = random_grid(rng.randrange(5, 30), rng.randrange(5, 30), 0.2, rng, diagonal, weighted=trial % 2 == 1)
+        start, goal = random_pairs(grid, 1, rng)[0]
+        planner = DStarLite(grid, start, goal)
+        for _ in range(25):
+            result = planner.compute()
+            assert_same_answer(grid, result, astar_search(grid, planner.start, goal), planner.start, goal)
+            if result.found and len(result.path) > 3 and rng.random() < 0.4:
+                planner.move_start(result.path[rng.randrange(1, 4)])  # walk a little way along the path
+            changed = []
+            for _ in range(rng.randrange(1, 8)):
+                cell = rng.randrange(grid.size)
+                if cell in (planner.start, goal):
+                    continue
+                grid.cells[cell] = 0 if grid.cells[cell] else rng.choice((1, 3))
+                changed.append(cell)
+            planner.cells_changed(changed)
+
+
+def test_hierarchical_paths_are_valid_and_never_shorter():
+    rng = random.Random(11)
+    for trial in range(8):
+        grid = random_grid(48, 48, rng.choice((0.1, 0.25, 0.35)), rng)
+        hierarchy = Hierarchy(grid, cluster_size=8)
+        for start, goal in random_pairs(grid, 30, rng):
+            result = hierarchy.search(start, goal)
+            reference = astar_search(grid, start, goal)
+            # on a 4-connected grid every crossing lies on a run with an entrance, so nothing is missed
+            assert result.found == reference.found
+            if reference.found:
+                assert result.cost >= reference.cost - 1e-9
+                assert result.path[0] == start and result.path[-1] == goal
+                assert path_cost(grid, result.path) == pytest.approx(result.cost)
+
+
+@pytest.mark.parametrize("diagonal", [False, True])
+def test_hierarchy_after_edits_matches_a_fresh_one(diagonal):
+    rng = random.Random(13)
+    grid = random_grid(40, 40, 0.2, rng, diagonal)
+    hierarchy = Hierarchy(grid, cluster_size=8)
+    hierarchy.precompute()
+    for _ in range(20):
+        changed = []
+        for _ in range(rng.randrange(1, 10)):
+            cell = rng.randrange(grid.size)
+            grid.cells[cell] = 0 if grid.cells[cell] else 1
+            changed.append(cell)
+        hierarchy.cells_changed(changed)
+        fresh = Hierarchy(grid, cluster_size=8)
+        assert hierarchy.entrances == fresh.entrances
+        assert hierarchy.inter == fresh.inter
+        assert hierarchy.transitions == fresh.transitions
+        for start, goal in random_pairs(grid, 10, rng):
+            assert hierarchy.search(start, goal).cost == pytest.approx(fresh.search(start, goal).cost)
+    hierarchy.precompute()
+    fresh.precompute()
+    assert hierarchy.intra == fresh.intra
+
+
+def random_graph(size, edges, rng, directed):
+    builder = GraphBuilder(size, directed)
+    for _ in range(edges):
+        builder.add_edge(rng.randrange(size), rng.randrange(size), rng.uniform(0.5, 10))
+    return builder.freeze()
+
+
+@pytest.mark.parametrize("directed", [False, True])
+def test_landmark_search_matches_dijkstra(directed, tmp_path):
+    rng = random.Random(17)
+    for trial in range(6):
+        size = rng.randrange(20, 300)
+        csr = random_graph(size, size * rng.choice((1, 2, 4)), rng, directed)
+        landmarks = Landmarks.build(csr, count=rng.randrange(1, 9), seed=trial)
+        path = tmp_path / f"{trial}.alt"
+        landmarks.save(path)
+        loaded = Landmarks.load(path, csr)
+        for _ in range(20):
+            source, target = rng.randrange(size), rng.randrange(size)
+            distance = shortest_paths(csr, source, target)[0][target]
+            for tables in (landmarks, loaded):
+                result = tables.search(source, target)
+                if distance == INF:
+                    assert not result.found
+                else:
+                    assert result.cost == pytest.approx(distance)
+            assert landmarks.lower_bound(source, target) <= distance + 1e-9
+
+
+@pytest.mark.parametrize("directed", [False, True])
+def test_landmark_bounds_never_overestimate(directed):
+    rng = random.Random(23)
+    csr = random_graph(150, 450, rng, directed)
+    landmarks = Landmarks.build(csr, count=8, seed=2)
+    for target in rng.sample(range(csr.size), 15):
+        to_target = shortest_paths(csr.reversed(), target)[0]  # distance from every vertex to the target
+        for source in range(csr.size):
+            bound = landmarks.lower_bound(source, target)
+            if to_target[source] == INF:
+                continue
+            assert bound <= to_target[source] + 1e-9
+
+
+@pytest.mark.parametrize("directed", [False, True])
+def test_landmark_heuristic_is_consistent(directed):
+    # consistency, h(u) <= w(u, v) + h(v) on every edge, is what lets A* expand each vertex once
+    rng = random.Random(19)
+    csr = random_graph(200, 600, rng, directed)
+    landmarks = Landmarks.build(csr, count=6, seed=1)
+    for target in rng.sample(range(csr.size), 10):
+        estimate = landmarks.heuristic(target, source=rng.randrange(csr.size))
+        for u in range(csr.size):
+            for v, weight in csr.neighbors(u):
+                h_u, h_v = estimate(u, target), estimate(v, target)
+                if not (math.isinf(h_u) or math.isinf(h_v)):
+                    assert h_u <= weight + h_v + 1e-9
+
+
+def test_search_stats_on_a_grid_and_a_csr_graph():
+    rng = random.Random(29)
+    grid = random_grid(30, 30, 0.2, rng)
+    csr = random_graph(200, 1000, rng, directed=True)
+    everywhere = shortest_paths(csr, 0)[0]
+    reached = [vertex for vertex, distance in enumerate(everywhere) if distance != INF]
+    target = max(reached, key=everywhere.__getitem__)
+    assert len(reached) > 100  # a long query, not a start that goes nowhere
+    for graph, (start, goal) in ((grid, random_pairs(grid, 1, rng)[0]), (csr, (0, target))):
+        reference = astar_search(graph, start, goal)
+        stats = SearchStats(trace=True)
+        result = astar_search(graph, start, goal, stats=stats)
+        assert result.found
+        assert (result.cost, result.path, result.nodes_expanded) == (reference.cost, reference.path,
+                                                                     reference.nodes_expanded)
+        assert stats.expansions == result.nodes_expanded
+        assert stats.pops == stats.stale_pops + len(stats.trace)
+        assert stats.trace[-1] == goal and len(stats.trace) == result.nodes_expanded + 1
+
+    stats = SearchStats(trace=True)
+    distances = shortest_paths(csr, 0, target, stats=stats)[0]
+    assert distances[target] == everywhere[target]
+    assert stats.trace[-1] == target and stats.expansions == len(stats.trace) - 1
+    stats = SearchStats()
+    shortest_paths(csr, 0, stats=stats)
+    assert stats.expansions == len(reached)
+    assert stats.relaxations == sum(csr.degree(vertex) for vertex in reached)
+
+
+def test_hierarchy_accepts_heuristic_names():
+    rng = random.Random(31)
+    grid = random_grid(48, 48, 0.1, rng)
+    by_name = Hierarchy(grid, cluster_size=8, heuristic="manhattan")
+    by_function = Hierarchy(grid, cluster_size=8)
+    for start, goal in random_pairs(grid, 10, rng):
+        assert by_name.search(start, goal).cost == pytest.approx(by_function.search(start, goal).cost)
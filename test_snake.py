@@ -0,0 +1,88 @@
+"""Checks for the snake rules and the agent environments."""
+import random
+
+import numpy as np
+import pytest
+
+from snake_autopilot import Autopilot
+from snake_engine import DIRECTIONS, SnakeGame
+from snake_env import SnakeEnv, VecSnakeEnv
+
+
+def test_two_quick_turns_cannot_reverse_the_snake():
+    game = SnakeGame(6, 6, start=(3, 3))
+    game.grow = 1
+    assert game.step()  # two cells long, heading up
+    game.turn("left")
+    game.turn("down")  # the opposite of the last move, so ignored
+    assert game.step()
+    assert game.alive
+    assert game.cells() == [(2, 2), (2, 3)]
+
+
+def test_a_turn_is_checked_against_the_last_move():
+    game = SnakeGame(6, 6, start=(3, 3))
+    game.turn("left")
+    game.turn("right")  # left was never moved, so right is still allowed
+    game.step()
+    assert game.moved == "right" and game.head == game.index(3, 4)
+
+
+@pytest.mark.parametrize("width, height", [(12, 8), (3, 3), (5, 4)])
+def test_vectorized_boards_replay_like_single_environments(width, height):
+    rng = random.Random(width * height)
+    count = 16
+    vec = VecSnakeEnv(count, width, height, max_steps=300)
+    envs = [SnakeEnv(width, height, max_steps=300) for _ in range(count)]
+    observations = vec.reset()
+    for board, env in enumerate(envs):
+        assert (observations[board] == env.reset()).all()
+    eaten = 0
+    for _ in range(1500):
+        actions = [rng.randrange(4) for _ in range(count)]
+        observations, rewards, dones, info = vec.step(actions)
+        eaten += int((rewards == 1).sum())
+        for board, env in enumerate(envs):
+            observation, reward, done, single_info = env.step(actions[board])
+            assert (reward, done) == (rewards[board], dones[board])
+            assert single_info["length"] == info["length"][board]
+            assert single_info["truncated"] == info["truncated"][board]
+            if done:
+                observation = env.reset()  # the vectorized board has already started over
+            assert np.array_equal(observation, observations[board])
+    assert eaten > 50  # the games got past their first apples
+
+
+def steer_by_hand(game, rng):
+    """A player heading for the apple most of the time, never straight into the body."""
+    options = [direction for direction in DIRECTIONS if not game.occupied[game.next_cell(direction)]]
+    if not options or rng.random() < 0.2:
+        return rng.choice(options or list(DIRECTIONS))
+    apple_row, apple_col = game.apple_pos
+
+    def distance(direction):
+        row, col = game.position(game.next_cell(direction))
+        d_row, d_col = (row - apple_row) % game.height, (col - apple_col) % game.width
+        return min(d_row, game.height - d_row) + min(d_col, game.width - d_col)
+
+    return min(options, key=distance)
+
+
+def test_autopilot_takes_over_a_game_in_progress():
+    rng = random.Random(5)
+    lengths = []
+    for _ in range(40):
+        game = SnakeGame(12, 8)
+        pilot = Autopilot(game)
+        for _ in range(rng.randrange(20, 301)):
+            game.step(steer_by_hand(game, rng))
+        if not game.alive or all(game.occupied[game.next_cell(direction)] for direction in DIRECTIONS):
+            continue  # the player lost, or left no way out
+        lengths.append(len(game.body))
+        pilot.take_over()
+        for _ in range(20000):
+            if game.apple is None:
+                break
+            assert game.step(pilot.next_direction())
+        assert game.apple is None  # the board filled up
+    assert len(lengths) > 30 and max(lengths) > 15  # long, tangled snakes were handed over